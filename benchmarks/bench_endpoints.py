@@ -0,0 +1,212 @@
+"""Benchmark: latency and throughput of every API endpoint on a synthetic data set.
+
+A fresh SQLite file database is filled by ``datagen.generate()`` at the given
+scale (users, timeslots and reservations; 10^3 to 10^6), then each endpoint
+registered in ``init_api`` is called --requests times through the Flask test
+client: listings, item reads, creates, updates and deletes. Creates run before
+the updates and deletes that use the rows they made, so every run does the
+same work. For each endpoint the script reports requests per second,
+p50/p95/p99 latency in milliseconds and the number of unexpected statuses.
+
+The event stream (/api/resources/<id>/events) never ends and is not timed.
+Half of the timeslots are reserved; the reservation endpoints need
+BATCH_SIZE + 1 free timeslots per request.
+
+Run with ``python benchmarks/bench_endpoints.py [--scale 10000] [--requests 200]``.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from datagen import api_key, generate
+
+from swimapi import create_app
+
+BATCH_SIZE = 10
+
+
+class Endpoint:
+    """One timed endpoint: call(i) makes the i-th request and returns the response."""
+
+    def __init__(self, name, status, call):
+        self.name = name
+        self.status = status
+        self.call = call
+
+
+def _endpoints(client, args, reserved):
+    """Return the Endpoints to time, in run order, for a data set of args.scale rows."""
+    rng = random.Random(args.seed)
+    scale, resources = args.scale, args.resources
+    admin = {"swimapi-api-key": api_key(1)}
+    created = {"user": [], "resource": [], "timeslot": [], "reservation": []}
+    free_slots = [n for n in range(1, scale + 1) if n not in reserved]
+    rng.shuffle(free_slots)
+    reservation_owners = {}
+
+    def user_key(user_id):
+        return {"swimapi-api-key": api_key(user_id)}
+
+    def create(kind, id_field, method, url, **kwargs):
+        response = client.open(url, method=method, **kwargs)
+        if response.status_code == 201:
+            created[kind].append(response.get_json()[id_field])
+        return response
+
+    def new_user(i):
+        return create("user", "user_id", "POST", "/api/users",
+                      json={"name": f"New {i}", "email": f"new{i}@bench.example"})
+
+    def update_user(i):
+        user_id = rng.randint(2, scale)
+        return client.put(f"/api/users/{user_id}", headers=user_key(user_id),
+                          json={"name": f"Renamed {i}", "email": f"user{user_id}@bench.example"})
+
+    def delete_user(i):
+        user_id = scale - i
+        return client.delete(f"/api/users/{user_id}", headers=user_key(user_id))
+
+    def reserve(i):
+        slot_id = free_slots.pop()
+        user_id = rng.randint(2, scale // 2)
+        response = create("reservation", "reservation_id", "POST", "/api/reservations",
+                          headers=user_key(user_id), json={"slot_id": slot_id})
+        if response.status_code == 201:
+            reservation_owners[created["reservation"][-1]] = user_id
+        return response
+
+    def cancel(i):
+        reservation_id = created["reservation"][i]
+        return client.delete(f"/api/reservations/{reservation_id}",
+                             headers=user_key(reservation_owners[reservation_id]))
+
+    def reserve_batch(_i):
+        slot_ids = [free_slots.pop() for _ in range(BATCH_SIZE)]
+        return client.post("/api/reservations/batch", headers=user_key(rng.randint(2, scale // 2)),
+                           json={"slot_ids": slot_ids, "atomic": False})
+
+    def timeslot_body(i):
+        start = date(2030, 1, 1) + timedelta(days=i)
+        return {"resource_id": 1,
+                "start_time": f"{start}T08:00:00", "end_time": f"{start}T09:00:00"}
+
+    def schedule(i):
+        day = date(2040, 1, 1) + timedelta(days=i)
+        return {"resource_id": 1, "start_date": str(day), "end_date": str(day),
+                "slot_minutes": 60, "opening_time": "06:00", "closing_time": "22:00"}
+
+    def random_day():
+        day = date(2026, 1, 1) + timedelta(days=rng.randrange(max(1, scale // resources // 48)))
+        return f"from={day}T00:00:00&to={day + timedelta(days=1)}T00:00:00"
+
+    return [
+        Endpoint("GET /api/users", 200, lambda i: client.get("/api/users")),
+        Endpoint("GET /api/users/<id>", 200,
+                 lambda i: client.get(f"/api/users/{rng.randint(1, scale)}")),
+        Endpoint("POST /api/users", 201, new_user),
+        Endpoint("POST /api/admin/users", 201, lambda i: client.post(
+            "/api/admin/users", json={"name": f"Admin {i}", "email": f"admin{i}@bench.example"})),
+        Endpoint("PUT /api/users/<id>", 204, update_user),
+        Endpoint("DELETE /api/users/<id>", 204, delete_user),
+
+        Endpoint("GET /api/resources", 200, lambda i: client.get("/api/resources")),
+        Endpoint("GET /api/resources/<id>", 200,
+                 lambda i: client.get(f"/api/resources/{rng.randint(1, resources)}")),
+        Endpoint("POST /api/resources", 201, lambda i: create(
+            "resource", "resource_id", "POST", "/api/resources", headers=admin,
+            json={"name": f"New Resource {i}", "resource_type": "gym"})),
+        Endpoint("PUT /api/resources/<id>", 204, lambda i: client.put(
+            f"/api/resources/{created['resource'][i]}", headers=admin,
+            json={"name": f"Renamed Resource {i}", "resource_type": "pool"})),
+        Endpoint("DELETE /api/resources/<id>", 204, lambda i: client.delete(
+            f"/api/resources/{created['resource'][i]}", headers=admin)),
+
+        Endpoint("GET /api/timeslots", 200, lambda i: client.get("/api/timeslots")),
+        Endpoint("GET /api/timeslots?resource_id&from&to", 200, lambda i: client.get(
+            f"/api/timeslots?resource_id={rng.randint(1, resources)}&{random_day()}")),
+        Endpoint("GET /api/timeslots?available=true", 200,
+                 lambda i: client.get("/api/timeslots?available=true")),
+        Endpoint("GET /api/timeslots/<id>", 200,
+                 lambda i: client.get(f"/api/timeslots/{rng.randint(1, scale)}")),
+        Endpoint("POST /api/timeslots", 201, lambda i: create(
+            "timeslot", "slot_id", "POST", "/api/timeslots", headers=admin,
+            json=timeslot_body(i))),
+        Endpoint("PUT /api/timeslots/<id>", 204, lambda i: client.put(
+            f"/api/timeslots/{created['timeslot'][i]}", headers=admin,
+            json=timeslot_body(args.requests + i))),
+        Endpoint("DELETE /api/timeslots/<id>", 204, lambda i: client.delete(
+            f"/api/timeslots/{created['timeslot'][i]}", headers=admin)),
+        Endpoint("POST /api/timeslots/bulk", 201,
+                 lambda i: client.post("/api/timeslots/bulk", headers=admin, json=schedule(i))),
+
+        Endpoint("GET /api/reservations", 200,
+                 lambda i: client.get("/api/reservations", headers=admin)),
+        Endpoint("POST /api/reservations", 201, reserve),
+        Endpoint("GET /api/reservations/<id>", 200, lambda i: client.get(
+            f"/api/reservations/{created['reservation'][i]}",
+            headers=user_key(reservation_owners[created["reservation"][i]]))),
+        Endpoint("DELETE /api/reservations/<id>", 204, cancel),
+        Endpoint("POST /api/reservations/batch", 200, reserve_batch),
+
+        Endpoint("GET /api/changes", 200, lambda i: client.get("/api/changes")),
+        Endpoint("GET /api/admin/cache-stats", 200,
+                 lambda i: client.get("/api/admin/cache-stats", headers=admin)),
+    ]
+
+
+def _time(endpoint, requests):
+    """Return (requests/s, p50, p95, p99 in ms, unexpected statuses) for one endpoint."""
+    samples, errors = [], 0
+    for i in range(requests):
+        started = time.perf_counter()
+        response = endpoint.call(i)
+        samples.append(time.perf_counter() - started)
+        errors += response.status_code != endpoint.status
+    percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return (
+        requests / sum(samples),
+        percentiles[49] * 1e3, percentiles[94] * 1e3, percentiles[98] * 1e3,
+        errors,
+    )
+
+
+def main():
+    """Generate the data set, time every endpoint and print the results table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10000,
+                        help="number of users, timeslots and reservations/2 to generate")
+    parser.add_argument("--resources", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="performance", help="SQLITE_PROFILE to use")
+    args = parser.parse_args()
+    if args.scale - args.scale // 2 < args.requests * (BATCH_SIZE + 1):
+        parser.error(f"--scale must be at least {2 * args.requests * (BATCH_SIZE + 1)} "
+                     f"for {args.requests} requests per endpoint")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(tmp) / 'bench.db'}",
+            "SQLITE_PROFILE": args.profile,
+        })
+        with app.app_context():
+            started = time.perf_counter()
+            reserved = generate(args.scale, args.resources, args.scale, args.scale // 2, args.seed)
+            print(f"generated {args.scale} users/timeslots and {args.scale // 2} reservations "
+                  f"in {time.perf_counter() - started:.1f} s\n")
+
+        client = app.test_client()
+        print(f"{'endpoint':<42}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for endpoint in _endpoints(client, args, reserved):
+            rate, p50, p95, p99, errors = _time(endpoint, args.requests)
+            print(f"{endpoint.name:<42}{rate:>9.0f}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}{errors:>8}")
+        with app.app_context():
+            app.extensions["sqlalchemy"].engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
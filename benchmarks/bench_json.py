@@ -0,0 +1,74 @@
+"""Micro-benchmark: encoding a 10k-slot timeslot listing response.
+
+Seeds an in-memory database with SLOTS timeslots (every tenth one reserved),
+loads them the way the listing endpoint does and times serialize() and the
+encoding of the page body with the stdlib and the orjson representation.
+
+Run with ``python benchmarks/bench_json.py``.
+"""
+import timeit
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import configure_mappers, selectinload
+
+from swimapi import create_app
+from swimapi.models import db, Reservation, Resource, Timeslot, User
+from swimapi.pagination import page_body
+from swimapi.representations import dumps, orjson
+
+SLOTS = 10000
+NUMBER = 5
+
+
+def _seed():
+    """Insert one user, one resource, SLOTS timeslots and a reservation on every tenth."""
+    base = datetime(2026, 1, 1, 6, 0)
+    db.session.execute(insert(User.__table__), [{"name": "Bench", "email": "bench@example.com"}])
+    db.session.execute(insert(Resource.__table__), [{"name": "Pool", "resource_type": "pool"}])
+    db.session.execute(insert(Timeslot.__table__), [
+        {
+            "resource_id": 1,
+            "start_time": base + i * timedelta(minutes=30),
+            "end_time": base + (i + 1) * timedelta(minutes=30),
+        }
+        for i in range(SLOTS)
+    ])
+    db.session.execute(insert(Reservation.__table__), [
+        {"user_id": 1, "slot_id": slot_id} for slot_id in range(1, SLOTS + 1, 10)
+    ])
+    db.session.commit()
+
+
+def _ms(func):
+    """Return the best time of func in milliseconds."""
+    return min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER * 1e3
+
+
+def main():
+    """Print serialization and encoding time of the listing for each JSON backend."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    with app.app_context():
+        _seed()
+        configure_mappers()
+        slots = db.session.scalars(
+            select(Timeslot).options(selectinload(Timeslot.reservations))
+        ).all()
+        body = page_body(slots, None)
+
+        print(f"{SLOTS} timeslots, {len(dumps(body)) / 1e6:.1f} MB body")
+        print(f"{'step':<12}{'time (ms)':>12}")
+        print(f"{'serialize':<12}{_ms(lambda: [slot.serialize() for slot in slots]):>12.1f}")
+        app.config["JSON_BACKEND"] = "json"
+        stdlib = _ms(lambda: dumps(body))
+        print(f"{'json':<12}{stdlib:>12.1f}")
+        if orjson is None:
+            print("orjson is not installed")
+            return
+        app.config["JSON_BACKEND"] = "orjson"
+        fast = _ms(lambda: dumps(body))
+        print(f"{'orjson':<12}{fast:>12.1f}  ({stdlib / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
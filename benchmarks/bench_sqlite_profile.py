@@ -0,0 +1,113 @@
+"""Benchmark: reservation throughput under concurrent readers per SQLite profile.
+
+For each profile in ``swimapi.SQLITE_PROFILES`` a fresh file database is seeded
+with timeslots. Writer threads then insert reservations, one commit each, while
+reader threads keep running the availability listing query. The script reports
+committed reservations per second, reads per second and writer errors (for
+example "database is locked").
+
+Run with ``python benchmarks/bench_sqlite_profile.py [--seconds 5] [--readers 8]``.
+"""
+import argparse
+import itertools
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, exists, insert, select
+from sqlalchemy.exc import OperationalError
+
+from swimapi import SQLITE_PROFILES, configure_sqlite
+from swimapi.models import db, Reservation, Resource, Timeslot, User
+
+SLOTS = 20000
+
+
+def _seed(engine):
+    """Create the schema and insert one user, one resource and SLOTS timeslots."""
+    db.metadata.create_all(engine)
+    base = datetime(2026, 1, 1, 6, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"name": "Bench", "email": "bench@example.com"}])
+        conn.execute(insert(Resource.__table__), [{"name": "Pool", "resource_type": "pool"}])
+        conn.execute(insert(Timeslot.__table__), [
+            {
+                "resource_id": 1,
+                "start_time": base + i * timedelta(minutes=30),
+                "end_time": base + (i + 1) * timedelta(minutes=30),
+            }
+            for i in range(SLOTS)
+        ])
+
+
+def _run(profile, seconds, readers, writers):
+    """Return (reservations/s, reads/s, writer errors) for one profile."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        configure_sqlite(engine, SQLITE_PROFILES[profile])
+        _seed(engine)
+
+        stop = threading.Event()
+        slot_ids = itertools.count(1)
+        counts = {"writes": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+
+        listing = (
+            select(Timeslot.slot_id, Timeslot.start_time)
+            .where(~exists().where(Reservation.slot_id == Timeslot.slot_id))
+            .order_by(Timeslot.slot_id)
+            .limit(100)
+        )
+
+        def reader():
+            while not stop.is_set():
+                with engine.connect() as conn:
+                    conn.execute(listing).all()
+                with lock:
+                    counts["reads"] += 1
+
+        def writer():
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            insert(Reservation.__table__),
+                            {"user_id": 1, "slot_id": next(slot_ids)},
+                        )
+                    key = "writes"
+                except OperationalError:
+                    key = "errors"
+                with lock:
+                    counts[key] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return counts["writes"] / seconds, counts["reads"] / seconds, counts["errors"]
+
+
+def main():
+    """Run the benchmark for every profile and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'profile':<14}{'reservations/s':>16}{'reads/s':>12}{'errors':>8}")
+    for profile in SQLITE_PROFILES:
+        writes, reads, errors = _run(profile, args.seconds, args.readers, args.writers)
+        print(f"{profile:<14}{writes:>16.0f}{reads:>12.0f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
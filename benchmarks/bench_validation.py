@@ -0,0 +1,47 @@
+"""Micro-benchmark: per-request JSON schema validation cost.
+
+Compares the original per-request ``jsonschema.validate(body, Model.json_schema(), ...)``
+call with the precompiled validators in ``swimapi.validation``.
+
+Run with ``python benchmarks/bench_validation.py``.
+"""
+import timeit
+
+from jsonschema import Draft7Validator, validate
+
+from swimapi.models import Resource, Timeslot, User
+from swimapi.validation import init_validators, validate_body
+
+CASES = [
+    ("User", User.json_schema,
+     {"name": "Alice", "email": "alice@example.com", "user_type": "customer"}),
+    ("Resource", Resource.json_schema,
+     {"name": "50m Pool", "description": "Olympic pool", "resource_type": "pool"}),
+    ("Timeslot", Timeslot.json_schema,
+     {"resource_id": 1, "start_time": "2026-02-21T08:00:00Z", "end_time": "2026-02-21T09:30:00Z"}),
+]
+NUMBER = 2000
+
+
+def _per_call_us(func):
+    """Return the best per-call time of func in microseconds."""
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def _validate_per_request(body, schema_fn):
+    """Validate body the original way, building the schema and validator on every call."""
+    validate(body, schema_fn(), format_checker=Draft7Validator.FORMAT_CHECKER)
+
+
+def main():
+    """Print before/after validation cost for each model schema."""
+    init_validators()
+    print(f"{'schema':<10}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, schema_fn, body in CASES:
+        before = _per_call_us(lambda s=schema_fn, b=body: _validate_per_request(b, s))
+        after = _per_call_us(lambda s=schema_fn, b=body: validate_body(b, s))
+        print(f"{name:<10}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
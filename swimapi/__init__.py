@@ -1,31 +1,162 @@
 """Flask application factory for the swimapi package."""
 
+from functools import partial
+
 from flask import Flask
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from .models import db
 from .extensions import cache
 from .api import init_api
+from .validation import init_validators
+from .changes import init_change_log
+from .events import init_events
+from .caching import init_caching
+from .timing import init_timing
+from .metrics import init_metrics
+from .utils import auth_cache
+from .migrations import upgrade_db_command
+
+
+SQLITE_PROFILES = {
+    # Only what correctness needs: enforce foreign keys (and ON DELETE CASCADE).
+    "default": {
+        "foreign_keys": "ON",
+    },
+    # Tuned for concurrent readers and writers on a file database. WAL lets
+    # readers run alongside a writer, synchronous=NORMAL only syncs at
+    # checkpoints (a power loss may drop the last commits but never corrupts).
+    "performance": {
+        "foreign_keys": "ON",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def sqlite_pragmas(config):
+    """Return the PRAGMAs for the SQLITE_PROFILE in config, updated with SQLITE_PRAGMAS."""
+    pragmas = dict(SQLITE_PROFILES[config.get("SQLITE_PROFILE", "default")])
+    pragmas.update(config.get("SQLITE_PRAGMAS", {}))
+    return pragmas
 
 
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_connection, _connection_record):
-    """Enable foreign key constraints for SQLite."""
+def set_sqlite_pragma(dbapi_connection, _connection_record, pragmas):
+    """Apply PRAGMA settings to a new SQLite connection."""
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
     cursor.close()
 
 
-def create_app():
-    """Create and configure the Flask application."""
+def configure_sqlite(engine, pragmas):
+    """Apply pragmas to every connection the engine opens, if it is a SQLite engine."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", partial(set_sqlite_pragma, pragmas=pragmas))
+
+
+DEV_API_KEY_SECRET = "swimapi-dev-secret"
+
+POOL_OPTIONS = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_RECYCLE": "pool_recycle",
+    "DB_POOL_PRE_PING": "pool_pre_ping",
+}
+QUEUE_POOL_OPTIONS = {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"}
+
+
+def uses_queue_pool(uri, options):
+    """Tell whether the engine for uri and options will use a QueuePool.
+
+    In-memory SQLite gets a StaticPool from Flask-SQLAlchemy, which rejects
+    the sizing options of a QueuePool.
+    """
+    poolclass = options.get("poolclass")
+    if poolclass is not None:
+        return issubclass(poolclass, QueuePool)
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite":
+        return url.database not in (None, "", ":memory:") and url.query.get("mode") != "memory"
+    return True
+
+
+def engine_options(config):
+    """Return SQLALCHEMY_ENGINE_OPTIONS with the DB_POOL_* settings from config merged in.
+
+    The QueuePool sizing settings are left out for engines with another pool.
+    """
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    queue_pool = uses_queue_pool(config["SQLALCHEMY_DATABASE_URI"], options)
+    for key, option in POOL_OPTIONS.items():
+        if config.get(key) is None or (option in QUEUE_POOL_OPTIONS and not queue_pool):
+            continue
+        options.setdefault(option, config[key])
+    return options
+
+
+def create_app(config=None):
+    """Create and configure the Flask application.
+
+    Settings are layered: built-in defaults, then SWIMAPI_* environment
+    variables (e.g. SWIMAPI_DATABASE_URL, SWIMAPI_DB_POOL_SIZE), then the
+    optional config mapping. DATABASE_URL, when set, overrides
+    SQLALCHEMY_DATABASE_URI from the same or a lower layer, so an explicit
+    SQLALCHEMY_DATABASE_URI in the mapping always wins.
+
+    Outside TESTING and DEBUG a warning is logged while API_KEY_SECRET
+    still has its built-in development value.
+
+    The response cache is configured with the usual Flask-Caching CACHE_*
+    settings. The default SimpleCache lives in one process; with several
+    workers use a shared backend (FileSystemCache, RedisCache or
+    MemcachedCache) so invalidations reach every worker.
+    """
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///example.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["API_KEY_SECRET"] = DEV_API_KEY_SECRET
+    app.config["SQLITE_PROFILE"] = "default"
+    app.config["JSON_BACKEND"] = "orjson"
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    app.config["CACHE_DEFAULT_TIMEOUT"] = 60
+    app.config["CACHE_KEY_PREFIX"] = "swimapi:"
+    app.config["CACHE_STALE_TIMEOUT"] = 60
+    app.config["CACHE_LOCK_TIMEOUT"] = 10
+    app.config.from_prefixed_env("SWIMAPI")
+    if app.config.get("DATABASE_URL"):
+        app.config["SQLALCHEMY_DATABASE_URI"] = app.config["DATABASE_URL"]
+    if config:
+        app.config.from_mapping(config)
+        if config.get("DATABASE_URL") and "SQLALCHEMY_DATABASE_URI" not in config:
+            app.config["SQLALCHEMY_DATABASE_URI"] = config["DATABASE_URL"]
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+    if app.config["API_KEY_SECRET"] == DEV_API_KEY_SECRET and not (app.testing or app.debug):
+        app.logger.warning(
+            "API_KEY_SECRET is the built-in development value; set SWIMAPI_API_KEY_SECRET "
+            "to a secret of your own before storing real API keys."
+        )
 
     db.init_app(app)
-    cache.init_app(app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 60})
+    with app.app_context():
+        configure_sqlite(db.engine, sqlite_pragmas(app.config))
+    cache.init_app(app)
+    auth_cache.init_app(app)
+    init_events(app)
+    init_metrics(app)
+    init_timing(app)
 
     init_api(app)
+    init_validators()
+    init_change_log()
+    init_caching()
+    app.cli.add_command(upgrade_db_command)
 
     with app.app_context():
         db.create_all()
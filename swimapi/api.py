@@ -2,22 +2,37 @@
 
 from flask_restful import Api
 
+from .conditional import add_etag
+from .representations import output_json
+
 from .resources.user import UserCollection, UserItem, AdminUserCollection
 from .resources.resources import ResourceCollection, ResourceItem
-from .resources.timeslot import TimeslotCollection, TimeslotItem
-from .resources.reservation import ReservationCollection, ReservationItem
+from .resources.timeslot import TimeslotCollection, TimeslotItem, TimeslotBulk
+from .resources.reservation import ReservationCollection, ReservationItem, ReservationBatch
+from .resources.changes import ChangeFeed
+from .resources.events import ResourceEvents
+from .resources.stats import CacheStats
+from .resources.metrics import Metrics
 
 
 def init_api(app):
     """Attach flask-restful Api to app and register all resource routes."""
     api = Api(app)
+    api.representations["application/json"] = output_json
+    app.after_request(add_etag)
 
     api.add_resource(UserCollection, "/api/users")
     api.add_resource(UserItem, "/api/users/<int:user_id>")
     api.add_resource(AdminUserCollection, "/api/admin/users")
     api.add_resource(ResourceCollection, "/api/resources")
     api.add_resource(ResourceItem, "/api/resources/<int:resource_id>")
+    api.add_resource(ResourceEvents, "/api/resources/<int:resource_id>/events")
     api.add_resource(TimeslotCollection, "/api/timeslots")
     api.add_resource(TimeslotItem, "/api/timeslots/<int:slot_id>")
+    api.add_resource(TimeslotBulk, "/api/timeslots/bulk")
     api.add_resource(ReservationCollection, "/api/reservations")
     api.add_resource(ReservationItem, "/api/reservations/<int:reservation_id>")
+    api.add_resource(ReservationBatch, "/api/reservations/batch")
+    api.add_resource(ChangeFeed, "/api/changes")
+    api.add_resource(CacheStats, "/api/admin/cache-stats")
+    api.add_resource(Metrics, "/metrics")
@@ -0,0 +1,292 @@
+"""Cached timeslot reads, invalidated when the writes they depend on commit.
+
+Each entry is stored together with the generation of its key. Invalidating a
+key deletes the entry and gives the key a new generation, so a value that a
+concurrent request computed from data read before the write can never be taken
+for current, in this process or another one sharing the cache backend.
+
+Timeslot listings are cached per resource and day (the serialized timeslots,
+with their reservation, that start that day); single timeslots as their
+representation and headers. A committed timeslot write invalidates its item
+and the buckets of its old and new position; a reservation created or deleted
+invalidates its timeslot's item and bucket. Those keys come from the change
+tracker, which also sees rows removed by ON DELETE CASCADE and Core INSERTs.
+
+Resource reads use cached_view(), which adds single-flight recomputation and
+stale-while-revalidate on expiry.
+
+Other endpoints declare the keys that depend on a model with @invalidates;
+the keys of every instance a flush inserts, updates or deletes are then
+invalidated when the transaction commits, so views never delete cache entries
+by hand.
+"""
+import functools
+import threading
+import time
+import uuid
+from collections import Counter
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .changes import on_commit
+from .extensions import cache
+
+GENERATION_TIMEOUT_FACTOR = 10
+LOCK_POLL_INTERVAL = 0.05
+
+_STALE = "swimapi_stale_cache_keys"
+_key_functions = {}
+
+
+class CacheStats:
+    """Per-process hit and miss counters, by cache namespace."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, namespace, hits=0, misses=0):
+        """Add hits and misses to a namespace's counters."""
+        with self._lock:
+            self._counts[namespace, "hits"] += hits
+            self._counts[namespace, "misses"] += misses
+
+    def snapshot(self):
+        """Return {namespace: {"hits": n, "misses": n}}."""
+        with self._lock:
+            stats = {}
+            for (namespace, kind), count in self._counts.items():
+                stats.setdefault(namespace, {"hits": 0, "misses": 0})[kind] = count
+            return stats
+
+    def clear(self):
+        """Reset all counters."""
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def bucket_key(resource_id, day):
+    """Return the cache key of a resource's timeslots starting on a day."""
+    return f"timeslots_{resource_id}_{day.isoformat()}"
+
+
+def timeslot_key(slot_id):
+    """Return the cache key of a single timeslot."""
+    return f"timeslot_{slot_id}"
+
+
+def _generation_key(key):
+    return f"{key}:gen"
+
+
+def _lookup(keys):
+    generations = dict(zip(keys, cache.get_many(*map(_generation_key, keys))))
+    found = {}
+    for key, entry in zip(keys, cache.get_many(*keys)):
+        if entry is not None and entry[0] == generations[key]:
+            found[key] = entry[1]
+    return found, generations
+
+
+def lookup(namespace, keys):
+    """Return the current cached values among keys and the generations they were checked against.
+
+    The first result maps key to value for each hit. Pass the second to
+    store() for the values computed for the misses.
+    """
+    found, generations = _lookup(keys)
+    cache_stats.record(namespace, hits=len(found), misses=len(keys) - len(found))
+    return found, generations
+
+
+def store(values, generations, timeout=None):
+    """Cache values, a mapping of key to value, under the generations returned by lookup()."""
+    if values:
+        cache.set_many(
+            {key: (generations[key], value) for key, value in values.items()}, timeout=timeout
+        )
+
+
+def invalidate(keys):
+    """Delete the entries for keys and move them to a new generation.
+
+    Generations outlive the entries (GENERATION_TIMEOUT_FACTOR times the
+    default timeout), so an entry stored under an old generation expires first.
+    """
+    keys = list(keys)
+    if keys:
+        timeout = current_app.config["CACHE_DEFAULT_TIMEOUT"] * GENERATION_TIMEOUT_FACTOR
+        generation = uuid.uuid4().hex
+        cache.set_many({_generation_key(key): generation for key in keys}, timeout=timeout)
+        cache.delete_many(*keys)
+
+
+def timeslot_keys(changes):
+    """Return the cache keys affected by committed timeslot and reservation changes."""
+    keys = set()
+    for change in changes:
+        if not (change["entity"] == "timeslot" and change["created"]):
+            keys.add(timeslot_key(change["slot_id"]))
+        keys.add(bucket_key(change["resource_id"], change["start_time"].date()))
+        if change["moved_from"] is not None:
+            resource_id, start_time = change["moved_from"]
+            keys.add(bucket_key(resource_id, start_time.date()))
+    return keys
+
+
+def invalidate_changes(changes):
+    """Invalidate the cache entries of committed changes (an on_commit listener)."""
+    if has_app_context():
+        invalidate(timeslot_keys(changes))
+
+
+_refresh_locks = [threading.Lock() for _ in range(64)]
+
+
+def _refresh_lock(key):
+    """Return the in-process lock guarding recomputation of a key."""
+    return _refresh_locks[hash(key) % len(_refresh_locks)]
+
+
+def _response_parts(rv):
+    """Return a flask-restful view result as (body, status, headers)."""
+    if not isinstance(rv, tuple):
+        return rv, 200, {}
+    return rv[0], rv[1] if len(rv) > 1 else 200, dict(rv[2]) if len(rv) > 2 else {}
+
+
+def _with_cache_status(entry, status):
+    body, code, headers, _ = entry
+    return body, code, {**headers, "X-Cache": status}
+
+
+def _recompute(key, compute, wait):
+    """Compute and store the value for key unless another request already is.
+
+    Requests in this process queue on a local lock; across processes the one
+    that adds the key's lock entry to the shared cache computes. Returns the
+    new entry, or None when wait is false and another request holds a lock.
+    Waiting requests poll for the other request's result for up to
+    CACHE_LOCK_TIMEOUT seconds and then compute it themselves.
+    """
+    config = current_app.config
+    local = _refresh_lock(key)
+    if not local.acquire(blocking=wait):
+        return None
+    try:
+        found, generations = _lookup([key])
+        if key in found and found[key][3] > time.time():
+            return found[key]
+
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + config["CACHE_LOCK_TIMEOUT"]
+        locked = cache.add(lock_key, 1, timeout=config["CACHE_LOCK_TIMEOUT"])
+        while not locked:
+            if not wait:
+                return None
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(LOCK_POLL_INTERVAL)
+            found, generations = _lookup([key])
+            if key in found and found[key][3] > time.time():
+                return found[key]
+            locked = cache.add(lock_key, 1, timeout=config["CACHE_LOCK_TIMEOUT"])
+
+        try:
+            body, code, headers = _response_parts(compute())
+            entry = (body, code, headers, time.time() + config["CACHE_DEFAULT_TIMEOUT"])
+            if code == 200:
+                store({key: entry}, generations,
+                      timeout=config["CACHE_DEFAULT_TIMEOUT"] + config["CACHE_STALE_TIMEOUT"])
+            return entry
+        finally:
+            # A request that gave up waiting must not release the other request's lock.
+            if locked:
+                cache.delete(lock_key)
+    finally:
+        local.release()
+
+
+def cached_view(namespace, make_key, unless=None):
+    """Cache a flask-restful view's 200 responses with single-flight refresh.
+
+    An entry is fresh for CACHE_DEFAULT_TIMEOUT seconds and then served stale
+    for up to CACHE_STALE_TIMEOUT more: the first request to find it stale
+    recomputes it while concurrent requests get the stale copy. On a miss one
+    request computes the value and the others wait for it. Responses carry
+    X-Cache: HIT, STALE or MISS. Invalidation removes the entry outright, so
+    a write is never followed by a stale read.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if unless is not None and unless():
+                return view(*args, **kwargs)
+
+            key = make_key(*args, **kwargs)
+            found, _ = lookup(namespace, [key])
+            entry = found.get(key)
+            if entry is not None and entry[3] > time.time():
+                return _with_cache_status(entry, "HIT")
+            if entry is not None:
+                refreshed = _recompute(key, lambda: view(*args, **kwargs), wait=False)
+                if refreshed is None:
+                    return _with_cache_status(entry, "STALE")
+                return _with_cache_status(refreshed, "MISS")
+            return _with_cache_status(
+                _recompute(key, lambda: view(*args, **kwargs), wait=True), "MISS"
+            )
+        return wrapper
+    return decorator
+
+
+def invalidates(model):
+    """Register a function returning the cache keys that depend on an instance of model.
+
+    The function is called after each flush that inserts, updates or deletes
+    an instance (primary keys are assigned and attribute history is still
+    available), and the keys are invalidated once the transaction commits.
+    """
+    def register(key_function):
+        _key_functions[model] = key_function
+        return key_function
+    return register
+
+
+def _collect_stale_keys(session, _flush_context):
+    """Collect the cache keys of the instances written by a flush."""
+    stale = session.info.setdefault(_STALE, set())
+    for obj in chain(session.new, session.deleted, session.dirty):
+        key_function = _key_functions.get(type(obj))
+        if key_function is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        stale.update(key_function(obj))
+
+
+def _invalidate_stale_keys(session):
+    """Invalidate the cache keys collected during the committed transaction."""
+    stale = session.info.pop(_STALE, None)
+    if stale and has_app_context():
+        invalidate(stale)
+
+
+def _discard_stale_keys(session):
+    """Forget the cache keys collected during a rolled back transaction."""
+    session.info.pop(_STALE, None)
+
+
+def init_caching():
+    """Register cache invalidation for committed writes (once per process)."""
+    on_commit(invalidate_changes)
+    if not event.contains(Session, "after_flush", _collect_stale_keys):
+        event.listen(Session, "after_flush", _collect_stale_keys)
+        event.listen(Session, "after_commit", _invalidate_stale_keys)
+        event.listen(Session, "after_rollback", _discard_stale_keys)
@@ -0,0 +1,195 @@
+"""Change log of timeslot and reservation writes, read by the /api/changes feed.
+
+ORM writes are recorded by session event hooks in the same transaction as the
+write itself. Rows that the database removes through ON DELETE CASCADE are
+looked up before the flush, while they still exist, so they get tombstones
+too. Core INSERTs bypass the unit of work and call record_changes() directly.
+A timeslot moved to another resource also gets a tombstone, and its
+reservation a tombstone and an upsert, so feeds filtered by resource see it
+leave the old resource and its reservation arrive at the new one.
+
+Once the transaction commits, the recorded changes are handed to the functions
+registered with on_commit(), e.g. to push live events to subscribers.
+"""
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from .models import ChangeLog, Reservation, Resource, Timeslot, User
+
+_PENDING = "swimapi_pending_changes"
+_UNCOMMITTED = "swimapi_uncommitted_changes"
+_LOG_COLUMNS = ("entity", "op", "entity_id", "resource_id")
+
+_commit_listeners = []
+
+
+def change(entity, op, entity_id, slot, *, created=False, moved_from=None):
+    """Return the change record for one timeslot or reservation.
+
+    slot is the (slot_id, resource_id, start_time) of the timeslot itself or of
+    the reserved timeslot. created marks an upsert that inserted the row, and
+    moved_from is a timeslot's previous (resource_id, start_time) if an update
+    moved it. Only entity, op, entity_id and resource_id are stored in the log;
+    the rest is for commit listeners.
+    """
+    slot_id, resource_id, start_time = slot
+    return {
+        "entity": entity, "op": op, "entity_id": entity_id, "resource_id": resource_id,
+        "slot_id": slot_id, "start_time": start_time,
+        "created": created, "moved_from": moved_from,
+    }
+
+
+def _log(session, changes):
+    """Insert change log rows in the session's current transaction."""
+    if changes:
+        session.connection().execute(
+            insert(ChangeLog.__table__),
+            [{key: c[key] for key in _LOG_COLUMNS} for c in changes],
+        )
+
+
+def record_changes(session, changes):
+    """Write change log rows in the session's current transaction."""
+    if changes:
+        _log(session, changes)
+        session.info.setdefault(_UNCOMMITTED, []).extend(changes)
+
+
+def on_commit(listener):
+    """Register listener(changes) to be called with the changes of each committed transaction."""
+    if listener not in _commit_listeners:
+        _commit_listeners.append(listener)
+    return listener
+
+
+def _deleted_rows(session, obj):
+    """Return delete changes for obj and every timeslot or reservation its deletion cascades to."""
+    slot_columns = (Timeslot.slot_id, Timeslot.resource_id, Timeslot.start_time)
+    reservations = select(Reservation.reservation_id, *slot_columns).join(
+        Timeslot, Reservation.slot_id == Timeslot.slot_id
+    )
+    slots = []
+    if isinstance(obj, Resource):
+        slots = session.execute(
+            select(*slot_columns).where(Timeslot.resource_id == obj.resource_id)
+        ).all()
+        reservations = reservations.where(Timeslot.resource_id == obj.resource_id)
+    elif isinstance(obj, Timeslot):
+        slots = [_previous_slot(obj)]
+        reservations = reservations.where(Reservation.slot_id == obj.slot_id)
+    elif isinstance(obj, Reservation):
+        reservations = reservations.where(Reservation.reservation_id == obj.reservation_id)
+    elif isinstance(obj, User):
+        reservations = reservations.where(Reservation.user_id == obj.user_id)
+    else:
+        return []
+
+    rows = [change("timeslot", "delete", slot[0], tuple(slot)) for slot in slots]
+    rows += [
+        change("reservation", "delete", reservation_id, tuple(slot))
+        for reservation_id, *slot in session.execute(reservations)
+    ]
+    return rows
+
+
+def _previous_slot(timeslot):
+    """Return the (slot_id, resource_id, start_time) a timeslot had when it was loaded."""
+    attrs = inspect(timeslot).attrs
+    resource_id = attrs.resource_id.history.deleted or [timeslot.resource_id]
+    start_time = attrs.start_time.history.deleted or [timeslot.start_time]
+    return timeslot.slot_id, resource_id[0], start_time[0]
+
+
+def _collect_changes(session, _flush_context, _instances):
+    """Note the timeslots and reservations this flush writes or deletes."""
+    deleted = {}
+    for obj in session.deleted:
+        for row in _deleted_rows(session, obj):
+            deleted[row["entity"], row["entity_id"]] = row
+
+    written = [
+        (obj, True, None) for obj in session.new if isinstance(obj, (Timeslot, Reservation))
+    ]
+    for obj in session.dirty:
+        if isinstance(obj, (Timeslot, Reservation)) and session.is_modified(obj):
+            previous = _previous_slot(obj)[1:] if isinstance(obj, Timeslot) else None
+            written.append((obj, False, previous))
+    session.info[_PENDING] = (list(deleted.values()), written)
+
+
+def _write_changes(session, _flush_context):
+    """Write the change log rows for the flush, now that new rows have IDs."""
+    changes, written = session.info.pop(_PENDING, ([], []))
+    conn = session.connection()
+
+    slot_ids = {obj.slot_id for obj, _, _ in written if isinstance(obj, Reservation)}
+    slots = {slot[0]: tuple(slot) for slot in conn.execute(
+        select(Timeslot.slot_id, Timeslot.resource_id, Timeslot.start_time)
+        .where(Timeslot.slot_id.in_(slot_ids))
+    )} if slot_ids else {}
+
+    resource_moves = {}
+    for obj, created, previous in written:
+        if isinstance(obj, Timeslot):
+            slot = (obj.slot_id, obj.resource_id, obj.start_time)
+            moved = previous if previous and previous != slot[1:] else None
+            if moved is not None and moved[0] != obj.resource_id:
+                resource_moves[slot] = moved
+            changes.append(change(
+                "timeslot", "upsert", obj.slot_id, slot, created=created, moved_from=moved
+            ))
+        else:
+            changes.append(change(
+                "reservation", "upsert", obj.reservation_id, slots[obj.slot_id], created=created
+            ))
+    # Logged first, so an unfiltered feed still ends at each entity's upsert.
+    _log(session, _resource_moves(conn, resource_moves))
+    record_changes(session, changes)
+
+
+def _resource_moves(conn, moved):
+    """Return log-only changes for timeslots moved to another resource.
+
+    moved maps a timeslot's (slot_id, resource_id, start_time) to its previous
+    (resource_id, start_time). Each timeslot gets a tombstone under its old
+    resource, and its reservation a tombstone there and an upsert under the
+    new one. They are not handed to commit listeners, which already see the
+    move through moved_from.
+    """
+    slots = {slot[0]: (slot, previous) for slot, previous in moved.items()}
+    rows = [
+        change("timeslot", "delete", slot_id, (slot_id, *previous))
+        for slot_id, (_, previous) in slots.items()
+    ]
+    if slots:
+        for reservation_id, slot_id in conn.execute(
+            select(Reservation.reservation_id, Reservation.slot_id)
+            .where(Reservation.slot_id.in_(slots))
+        ):
+            slot, previous = slots[slot_id]
+            rows.append(change("reservation", "delete", reservation_id, (slot_id, *previous)))
+            rows.append(change("reservation", "upsert", reservation_id, slot))
+    return rows
+
+
+def _publish_changes(session):
+    """Hand the changes of the committed transaction to the commit listeners."""
+    changes = session.info.pop(_UNCOMMITTED, [])
+    if changes:
+        for listener in _commit_listeners:
+            listener(changes)
+
+
+def _discard_changes(session):
+    """Forget the changes of a rolled back transaction."""
+    session.info.pop(_UNCOMMITTED, None)
+
+
+def init_change_log():
+    """Register the session hooks that fill the change log (once per process)."""
+    if not event.contains(Session, "before_flush", _collect_changes):
+        event.listen(Session, "before_flush", _collect_changes)
+        event.listen(Session, "after_flush", _write_changes)
+        event.listen(Session, "after_commit", _publish_changes)
+        event.listen(Session, "after_rollback", _discard_changes)
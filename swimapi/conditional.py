@@ -0,0 +1,84 @@
+"""Conditional request support: ETags, 304 Not Modified and If-Match preconditions."""
+from flask import Response, request
+from sqlalchemy import inspect
+from werkzeug.exceptions import PreconditionFailed
+from werkzeug.http import http_date, quote_etag, unquote_etag
+
+from .fields import fields_tag
+
+
+def add_etag(response):
+    """Give successful GET responses a strong ETag and answer If-None-Match with 304.
+
+    Registered as an after_request hook. The ETag is a hash of the response
+    body unless a view has already set one, so unchanged polls get an empty
+    304 instead of the full body.
+    """
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+    if response.is_streamed:
+        return response
+    if response.get_etag() == (None, None):
+        response.add_etag()
+    return response.make_conditional(request)
+
+
+def item_etag(obj, *extra):
+    """Return the unquoted strong ETag of a versioned model instance.
+
+    It is built from the table name, primary key and row version, plus any
+    extra parts for state embedded in the representation (e.g. a timeslot's
+    reservation), so it can be computed without serializing obj.
+    """
+    key = inspect(obj).mapper.primary_key_from_instance(obj)
+    parts = [obj.__tablename__, *map(str, key), f"v{obj.version}", *map(str, extra)]
+    return "-".join(parts)
+
+
+def version_headers(obj, *extra):
+    """Return ETag and Last-Modified headers for a versioned model instance."""
+    headers = {"ETag": quote_etag(item_etag(obj, *extra))}
+    if obj.updated_at is not None:
+        headers["Last-Modified"] = http_date(obj.updated_at)
+    return headers
+
+
+def conditional_item(obj, *extra, fields=None):
+    """Return the GET response for a versioned model instance.
+
+    A client whose If-None-Match already holds the current ETag gets a 304
+    before obj is serialized. A sparse representation (fields) has an ETag
+    of its own.
+    """
+    extra += fields_tag(fields)
+    headers = version_headers(obj, *extra)
+    if request.if_none_match.contains(item_etag(obj, *extra)):
+        return Response(status=304, headers=headers)
+    return obj.serialize(fields), 200, headers
+
+
+def tag_headers(headers, *extra):
+    """Return version headers with extra parts appended to their ETag."""
+    if not extra:
+        return headers
+    etag, _ = unquote_etag(headers["ETag"])
+    return {**headers, "ETag": quote_etag("-".join([etag, *extra]))}
+
+
+def conditional_response(body, headers):
+    """Return the GET response for an already serialized body and its ETag headers.
+
+    Like conditional_item(), but for a representation taken from a cache.
+    """
+    etag, _ = unquote_etag(headers["ETag"])
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    return body, 200, headers
+
+
+def require_if_match(obj, *extra):
+    """Raise 412 if the request has an If-Match header that does not match obj."""
+    if request.if_match and not request.if_match.contains(item_etag(obj, *extra)):
+        raise PreconditionFailed(
+            description="The resource has been modified since it was retrieved."
+        )
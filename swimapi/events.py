@@ -0,0 +1,111 @@
+"""Publish/subscribe of live reservation events for the Server-Sent Events stream.
+
+Committed reservation changes are published on a channel per resource. The
+broker is pluggable: set EVENT_BROKER to any object with subscribe(channel),
+unsubscribe(channel, subscription) and publish(channel, event) to fan events
+out across processes; by default each process uses its own LocalBroker.
+"""
+import queue
+import threading
+
+from flask import current_app, has_app_context
+
+from .changes import on_commit
+
+EVENT_TYPES = {
+    "upsert": "reservation.created",
+    "delete": "reservation.cancelled",
+}
+
+
+class Subscription:
+    """A subscriber's bounded queue of pending events."""
+
+    def __init__(self, maxsize):
+        self.events = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        """Queue an event, or mark the subscription overflowed if it is full."""
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Return the next event, or None if none arrives within timeout seconds."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalBroker:
+    """Delivers events to the subscribers in this process.
+
+    A subscriber that falls queue_size events behind is marked overflowed
+    instead of blocking the publisher; its stream then ends so the client
+    reconnects and resyncs.
+    """
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Return a new Subscription to a channel."""
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        """Stop delivering a channel's events to a subscription."""
+        with self._lock:
+            subscribers = self._channels.get(channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._channels.pop(channel, None)
+
+    def publish(self, channel, event):
+        """Queue an event for every current subscriber of a channel."""
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscriber_count(self, channel):
+        """Return the number of subscribers of a channel."""
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+
+def init_events(app):
+    """Set up the app's broker from EVENT_BROKER, defaulting to a LocalBroker."""
+    app.config.setdefault("EVENT_QUEUE_SIZE", 256)
+    app.config.setdefault("EVENT_HEARTBEAT", 15)
+    broker = app.config.get("EVENT_BROKER") or LocalBroker(app.config["EVENT_QUEUE_SIZE"])
+    app.extensions["swimapi_broker"] = broker
+    on_commit(publish_reservation_events)
+
+
+def get_broker():
+    """Return the current app's broker."""
+    return current_app.extensions["swimapi_broker"]
+
+
+def publish_reservation_events(changes):
+    """Publish each committed reservation change on its resource's channel."""
+    if not has_app_context() or "swimapi_broker" not in current_app.extensions:
+        return
+    broker = get_broker()
+    for change in changes:
+        if change["entity"] != "reservation" or change["resource_id"] is None:
+            continue
+        broker.publish(change["resource_id"], {
+            "type": EVENT_TYPES[change["op"]],
+            "reservation_id": change["entity_id"],
+            "slot_id": change["slot_id"],
+            "resource_id": change["resource_id"],
+        })
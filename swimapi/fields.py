@@ -0,0 +1,58 @@
+"""Sparse fieldsets: ?fields= limits a representation to some of its keys.
+
+The requested fields also limit what is read from the database: load_fields()
+restricts a query to the columns behind them, and relationships such as a
+timeslot's reservation are only loaded when they are asked for.
+"""
+from flask import request
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import BadRequest
+
+
+def fields_arg(model):
+    """Return the set of fields requested with ?fields=, None if absent, or raise 400."""
+    value = request.args.get("fields")
+    if value is None:
+        return None
+    fields = {name.strip() for name in value.split(",")} - {""}
+    if not fields or not fields <= model.serializers.keys():
+        raise BadRequest(
+            description=f"fields must be a comma-separated list of: {', '.join(model.serializers)}."
+        )
+    return frozenset(fields)
+
+
+def wants_field(fields, name):
+    """Return True if the representation includes name."""
+    return fields is None or name in fields
+
+
+def load_fields(model, fields, *required):
+    """Return loader options that load only the columns behind fields.
+
+    Primary keys and the attributes named in required (e.g. the version and
+    updated_at an ETag is built from) are always loaded. Returns no options
+    when fields is None.
+    """
+    if fields is None:
+        return []
+    mapper = inspect(model)
+    names = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+    names.extend(prop.key for prop in mapper.column_attrs if prop.key in fields)
+    names.extend(required)
+    return [load_only(*(getattr(model, name) for name in dict.fromkeys(names)))]
+
+
+def trim(item, fields):
+    """Return an already serialized item limited to fields."""
+    if fields is None:
+        return item
+    return {name: value for name, value in item.items() if name in fields}
+
+
+def fields_tag(fields):
+    """Return the ETag parts that tell a sparse representation from the full one."""
+    if fields is None:
+        return ()
+    return (f"fields={','.join(sorted(fields))}",)
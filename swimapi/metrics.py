@@ -0,0 +1,320 @@
+"""Request, cache and database metrics in the Prometheus text exposition format.
+
+Each process counts into its own MetricsRegistry. With METRICS_DIR set (a
+directory shared by the workers of one deployment) every process also writes
+its values to a file named by a random per-process id, at most every
+METRICS_FLUSH_INTERVAL seconds and when it exits, and /metrics adds up the
+files of all processes, so a scrape that reaches any worker sees the totals.
+So that counters never go backwards but the directory does not grow with
+every restart, a scrape folds the files of exited workers on the same host
+into aggregate.json. Without METRICS_DIR /metrics shows the values of the
+process that serves it.
+"""
+import atexit
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: without flock, files of exited workers are kept
+    fcntl = None
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from .caching import cache_stats
+from .models import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "swimapi_requests_total": (
+        "counter", "HTTP requests handled, by flask-restful resource, method and status."
+    ),
+    "swimapi_request_duration_seconds": (
+        "histogram", "Time to handle a request, by flask-restful resource and method."
+    ),
+    "swimapi_cache_requests_total": (
+        "counter", "Response cache lookups, by cache namespace and result (hit or miss)."
+    ),
+    "swimapi_db_pool_checkouts_total": (
+        "counter", "Connections checked out of the database connection pool."
+    ),
+    "swimapi_reservation_conflicts_total": (
+        "counter", "Reservations rejected with 409 because the timeslot was already reserved."
+    ),
+}
+
+AGGREGATE = "aggregate.json"
+
+_START = "swimapi_metrics_start"
+_flushed_on_exit = set()
+_process = {"pid": None, "id": None}
+
+
+class MetricsRegistry:
+    """Counters and latency histograms of one process, keyed by name and label pairs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = Counter()
+        self.histograms = {}
+        self.flushed_at = 0.0
+
+    def inc(self, name, labels=(), amount=1):
+        """Add amount to a counter."""
+        with self._lock:
+            self.counters[name, tuple(labels)] += amount
+
+    def observe(self, name, labels, value):
+        """Record a value in a histogram with LATENCY_BUCKETS."""
+        key = (name, tuple(labels))
+        with self._lock:
+            buckets, total = self.histograms.get(key) or ([0] * (len(LATENCY_BUCKETS) + 1), 0.0)
+            buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+            self.histograms[key] = (buckets, total + value)
+
+    def snapshot(self):
+        """Return the values as a JSON-serializable dict, including the cache statistics."""
+        with self._lock:
+            counters = [[name, labels, value] for (name, labels), value in self.counters.items()]
+            histograms = [
+                [name, labels, list(buckets), total]
+                for (name, labels), (buckets, total) in self.histograms.items()
+            ]
+        for namespace, counts in cache_stats.snapshot().items():
+            for result, count in (("hit", counts["hits"]), ("miss", counts["misses"])):
+                labels = (("namespace", namespace), ("result", result))
+                counters.append(["swimapi_cache_requests_total", labels, count])
+        return {"counters": counters, "histograms": histograms}
+
+    def clear(self):
+        """Reset all values."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _labels(pairs):
+    """Return label pairs (possibly lists read from JSON) as a hashable tuple."""
+    return tuple(tuple(pair) for pair in pairs)
+
+
+def merge(snapshots):
+    """Return the sum of several snapshot() dicts as (counters, histograms) mappings."""
+    counters, histograms = Counter(), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            counters[name, _labels(labels)] += value
+        for name, labels, buckets, total in snapshot["histograms"]:
+            key = (name, _labels(labels))
+            merged, merged_total = histograms.get(key, ([0] * len(buckets), 0.0))
+            histograms[key] = ([a + b for a, b in zip(merged, buckets)], merged_total + total)
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name, labels, value):
+    label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+    return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+
+def render(counters, histograms):
+    """Return merged counters and histograms in the Prometheus text format."""
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            lines.extend(
+                _sample(name, labels, value)
+                for (metric, labels), value in sorted(counters.items()) if metric == name
+            )
+            continue
+        for (metric, labels), (buckets, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), buckets):
+                cumulative += count
+                lines.append(_sample(f"{name}_bucket", (*labels, ("le", bound)), cumulative))
+            lines.append(_sample(f"{name}_sum", labels, total))
+            lines.append(_sample(f"{name}_count", labels, cumulative))
+    return "\n".join(lines) + "\n"
+
+
+def snapshot_name():
+    """Return the file name of this process's snapshot.
+
+    The name is random rather than the pid, so a new process that reuses an
+    exited worker's pid does not overwrite that worker's counts. It is renewed
+    after a fork.
+    """
+    if _process["pid"] != os.getpid():
+        _process.update(pid=os.getpid(), id=uuid.uuid4().hex)
+    return f"{_process['id']}.json"
+
+
+def _write_json(path, data):
+    """Atomically replace path with data as JSON."""
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False) as file:
+        json.dump(data, file)
+    os.replace(file.name, path)
+
+
+def write_snapshot(directory):
+    """Atomically write this process's snapshot to directory."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    snapshot = registry.snapshot()
+    snapshot.update(pid=os.getpid(), host=socket.gethostname())
+    _write_json(directory / snapshot_name(), snapshot)
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def read_snapshots(directory):
+    """Return the snapshots written by every process to directory, and their aggregate."""
+    snapshots = (_read(path) for path in Path(directory).glob("*.json"))
+    return [snapshot for snapshot in snapshots if snapshot is not None]
+
+
+def _exited(snapshot):
+    """Tell whether the process that wrote snapshot has exited."""
+    pid = snapshot.get("pid")
+    if not isinstance(pid, int) or pid == os.getpid():
+        return False
+    if snapshot.get("host") != socket.gethostname():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:  # alive, but owned by another user
+        return False
+    return False
+
+
+def prune_snapshots(directory):
+    """Fold the snapshots of exited processes into AGGREGATE and remove their files.
+
+    Call with the directory locked. A file whose pid has been reused is kept
+    until that process exits too.
+    """
+    if fcntl is None:
+        return
+    directory = Path(directory)
+    exited = {}
+    for path in directory.glob("*.json"):
+        if path.name != AGGREGATE:
+            snapshot = _read(path)
+            if snapshot is not None and _exited(snapshot):
+                exited[path] = snapshot
+    if not exited:
+        return
+    aggregate = _read(directory / AGGREGATE) or {"counters": [], "histograms": []}
+    counters, histograms = merge([aggregate, *exited.values()])
+    _write_json(directory / AGGREGATE, {
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+        "histograms": [
+            [name, labels, buckets, total]
+            for (name, labels), (buckets, total) in histograms.items()
+        ],
+    })
+    for path in exited:
+        path.unlink(missing_ok=True)
+
+
+@contextmanager
+def _locked(directory):
+    """Hold an exclusive lock on directory, so scrapes do not fold the same file twice."""
+    if fcntl is None:
+        yield
+        return
+    with open(Path(directory) / ".lock", "w", encoding="utf-8") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def collect():
+    """Return the metrics of this process, or of all processes sharing METRICS_DIR, as text."""
+    directory = current_app.config["METRICS_DIR"]
+    if not directory:
+        return render(*merge([registry.snapshot()]))
+    write_snapshot(directory)
+    with _locked(directory):
+        prune_snapshots(directory)
+        snapshots = read_snapshots(directory)
+    return render(*merge(snapshots))
+
+
+def _start_request():
+    setattr(g, _START, time.perf_counter())
+
+
+def _record_request(response):
+    """Count the request and its duration, and flush to METRICS_DIR when due."""
+    started = g.pop(_START, None)
+    if started is None:
+        return response
+    resource = request.endpoint or "none"
+    registry.inc("swimapi_requests_total", (
+        ("resource", resource), ("method", request.method), ("status", str(response.status_code))
+    ))
+    registry.observe("swimapi_request_duration_seconds", (
+        ("resource", resource), ("method", request.method)
+    ), time.perf_counter() - started)
+
+    directory = current_app.config["METRICS_DIR"]
+    now = time.monotonic()
+    if directory and now - registry.flushed_at >= current_app.config["METRICS_FLUSH_INTERVAL"]:
+        registry.flushed_at = now
+        write_snapshot(directory)
+    return response
+
+
+def _count_checkout(_dbapi_connection, _connection_record, _connection_proxy):
+    registry.inc("swimapi_db_pool_checkouts_total")
+
+
+def init_metrics(app):
+    """Register the request hooks and the connection pool listener.
+
+    Call before other after_request hooks are registered, so the status
+    recorded is the one finally sent.
+    """
+    app.config.setdefault("METRICS_DIR", None)
+    app.config.setdefault("METRICS_FLUSH_INTERVAL", 1.0)
+    directory = app.config["METRICS_DIR"]
+    if directory and directory not in _flushed_on_exit:
+        _flushed_on_exit.add(directory)
+        atexit.register(write_snapshot, directory)
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "checkout", _count_checkout):
+        event.listen(engine, "checkout", _count_checkout)
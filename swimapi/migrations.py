@@ -0,0 +1,78 @@
+"""In-place upgrades for databases created by older versions of swimapi."""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+
+from .models import API_KEY_PREFIX_LENGTH, db, hash_api_key
+
+
+def hash_plaintext_api_keys(conn):
+    """Replace plaintext API keys with their hash and fill in the lookup prefix.
+
+    Rows that already have a prefix are skipped, so running this twice is safe.
+    Returns the number of keys hashed.
+    """
+    columns = {c["name"] for c in inspect(conn).get_columns("user")}
+    if "api_key_prefix" not in columns:
+        conn.execute(text(
+            f'ALTER TABLE "user" ADD COLUMN api_key_prefix VARCHAR({API_KEY_PREFIX_LENGTH})'
+        ))
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_user_api_key_prefix ON "user" (api_key_prefix)'
+        ))
+
+    rows = conn.execute(text(
+        'SELECT user_id, api_key FROM "user" '
+        "WHERE api_key IS NOT NULL AND api_key_prefix IS NULL"
+    )).all()
+    for user_id, api_key in rows:
+        conn.execute(
+            text('UPDATE "user" SET api_key = :hash, api_key_prefix = :prefix '
+                 "WHERE user_id = :user_id"),
+            {
+                "hash": hash_api_key(api_key),
+                "prefix": api_key[:API_KEY_PREFIX_LENGTH],
+                "user_id": user_id,
+            },
+        )
+    return len(rows)
+
+
+def add_version_columns(conn):
+    """Add the version and updated_at columns to tables created before row versioning.
+
+    Existing rows start at version 1 with updated_at set to their created_at
+    (or the current time). Returns the number of tables altered.
+    """
+    altered = 0
+    for table in ("user", "resource", "timeslot", "reservation"):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "version" in columns:
+            continue
+        conn.execute(text(
+            f'ALTER TABLE "{table}" ADD COLUMN version INTEGER NOT NULL DEFAULT 1'
+        ))
+        # SQLite cannot add a column with a non-constant default, so fill it in;
+        # new rows get their value from the models' client-side default.
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN updated_at DATETIME'))
+        source = "created_at" if "created_at" in columns else "CURRENT_TIMESTAMP"
+        conn.execute(text(f'UPDATE "{table}" SET updated_at = {source}'))
+        altered += 1
+    return altered
+
+
+def upgrade_db():
+    """Apply all in-place upgrades to the app's database in one transaction."""
+    with db.engine.begin() as conn:
+        return {
+            "api_keys_hashed": hash_plaintext_api_keys(conn),
+            "tables_versioned": add_version_columns(conn),
+        }
+
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command():
+    """Upgrade an existing database (e.g. example.db) to the current schema."""
+    for step, count in upgrade_db().items():
+        click.echo(f"{step}: {count}")
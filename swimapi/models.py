@@ -1,18 +1,71 @@
 """Database models for the swimapi application."""
 
+import hashlib
+import hmac
 from datetime import datetime
+from operator import attrgetter
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
 
+API_KEY_PREFIX_LENGTH = 8
 
-class User(db.Model):
+
+def hash_api_key(api_key):
+    """Return the hex HMAC-SHA256 of an API key keyed with the API_KEY_SECRET config value."""
+    secret = current_app.config["API_KEY_SECRET"].encode()
+    return hmac.new(secret, api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def insert_if_absent(model, *conflict_columns):
+    """Return an INSERT for model that skips rows clashing on a unique constraint.
+
+    On SQLite and PostgreSQL this is INSERT ... ON CONFLICT DO NOTHING, so a row
+    that already exists is skipped by the database in the same statement. Other
+    backends get a plain INSERT and callers must still handle IntegrityError.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
+    return insert(model)
+
+
+def _isoformat(value):
+    """Return a datetime as an ISO 8601 string, or None."""
+    return value.isoformat() if value else None
+
+
+class Serializable:
+    """Mixin providing serialize() from a model's serializers table.
+
+    serializers maps each key of the representation, in order, to a function
+    of the instance returning its value, so a sparse representation only
+    reads the attributes behind the requested fields.
+    """
+
+    serializers = {}
+
+    def serialize(self, fields=None):
+        """Return a dictionary representation, limited to the keys in fields if given."""
+        if fields is None:
+            return {name: get(self) for name, get in self.serializers.items()}
+        return {name: get(self) for name, get in self.serializers.items() if name in fields}
+
+
+class User(Serializable, db.Model):
     """Represents a user of the swim facility."""
 
     user_id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(255), unique=True, nullable=False)
-    api_key = db.Column(db.String(64), unique=True)
+    # Only the keyed hash of the API key is stored; the column keeps its old name.
+    api_key_hash = db.Column("api_key", db.String(64), unique=True)
+    api_key_prefix = db.Column(db.String(API_KEY_PREFIX_LENGTH), index=True)
     user_type = db.Column(
         db.Enum('customer', 'admin'),
         default='customer',
@@ -24,16 +77,38 @@ class User(db.Model):
         server_default=db.func.current_timestamp(),
         nullable=False
     )
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        server_default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+        nullable=False
+    )
 
-    def serialize(self):
-        """Return a dictionary representation of the user."""
-        return {
-            "user_id": self.user_id,
-            "name": self.name,
-            "email": self.email,
-            "user_type": self.user_type,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def api_key(self):
+        """Return the plaintext API key if it was set on this instance, otherwise None."""
+        return getattr(self, "_api_key", None)
+
+    @api_key.setter
+    def api_key(self, value):
+        """Store the hash and lookup prefix of a new plaintext API key."""
+        self._api_key = value
+        self.api_key_hash = hash_api_key(value) if value else None
+        self.api_key_prefix = value[:API_KEY_PREFIX_LENGTH] if value else None
+
+    serializers = {
+        "user_id": attrgetter("user_id"),
+        "name": attrgetter("name"),
+        "email": attrgetter("email"),
+        "user_type": attrgetter("user_type"),
+        "created_at": lambda user: _isoformat(user.created_at),
+        "version": attrgetter("version"),
+        "updated_at": lambda user: _isoformat(user.updated_at),
+    }
 
     def deserialize(self, doc):
         """Populate the user's fields from a dictionary."""
@@ -65,7 +140,7 @@ class User(db.Model):
         }
         return schema
 
-class Resource(db.Model):
+class Resource(Serializable, db.Model):
     """Represents a bookable resource such as a pool, sauna, or gym."""
 
     resource_id = db.Column(db.Integer, primary_key=True)
@@ -75,15 +150,25 @@ class Resource(db.Model):
         db.Enum('pool', 'sauna', 'gym'),
         nullable=False
     )
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        server_default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+        nullable=False
+    )
 
-    def serialize(self):
-        """Return a dictionary representation of the resource."""
-        return {
-            "resource_id": self.resource_id,
-            "name": self.name,
-            "description": self.description,
-            "resource_type": self.resource_type,
-        }
+    __mapper_args__ = {"version_id_col": version}
+
+    serializers = {
+        "resource_id": attrgetter("resource_id"),
+        "name": attrgetter("name"),
+        "description": attrgetter("description"),
+        "resource_type": attrgetter("resource_type"),
+        "version": attrgetter("version"),
+        "updated_at": lambda resource: _isoformat(resource.updated_at),
+    }
 
     def deserialize(self, doc):
         """Populate the resource's fields from a dictionary."""
@@ -114,7 +199,7 @@ class Resource(db.Model):
         }
         return schema
 
-class Timeslot(db.Model):
+class Timeslot(Serializable, db.Model):
     """Represents a time slot associated with a bookable resource."""
 
     slot_id = db.Column(db.Integer, primary_key=True)
@@ -125,25 +210,36 @@ class Timeslot(db.Model):
     )
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        server_default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+        nullable=False
+    )
 
     __table_args__ = (
         db.UniqueConstraint('resource_id', 'start_time', name='uq_timeslot_resource_start'),
     )
+    __mapper_args__ = {"version_id_col": version}
 
     resource = db.relationship(
         'Resource',
-        backref=db.backref('timeslots', lazy=True, passive_deletes=True)
+        backref=db.backref('timeslots', lazy=True, passive_deletes="all")
         )
 
-    def serialize(self):
-        """Return a dictionary representation of the timeslot."""
-        return {
-            "slot_id": self.slot_id,
-            "resource_id": self.resource_id,
-            "start_time": self.start_time.isoformat() if self.start_time else None,
-            "end_time": self.end_time.isoformat() if self.end_time else None,
-            "reservation": self.reservations[0].serialize() if self.reservations else None,
-        }
+    serializers = {
+        "slot_id": attrgetter("slot_id"),
+        "resource_id": attrgetter("resource_id"),
+        "start_time": lambda slot: _isoformat(slot.start_time),
+        "end_time": lambda slot: _isoformat(slot.end_time),
+        "reservation": lambda slot: (
+            slot.reservations[0].serialize() if slot.reservations else None
+        ),
+        "version": attrgetter("version"),
+        "updated_at": lambda slot: _isoformat(slot.updated_at),
+    }
 
     def deserialize(self, doc):
         """Populate the timeslot's fields from a dictionary."""
@@ -175,7 +271,50 @@ class Timeslot(db.Model):
         }
         return schema
 
-class Reservation(db.Model):
+    @staticmethod
+    def bulk_schema():
+        """Return the JSON schema for generating a recurring schedule of timeslots."""
+        schema = {
+            "type": "object",
+            "required": [
+                "resource_id", "start_date", "end_date",
+                "slot_minutes", "opening_time", "closing_time"
+            ]
+        }
+        props = schema["properties"] = {}
+        props["resource_id"] = {
+            "description": "ID of the associated resource",
+            "type": "integer"
+        }
+        props["start_date"] = {
+            "description": "First day of the schedule (YYYY-MM-DD)",
+            "type": "string",
+            "format": "date"
+        }
+        props["end_date"] = {
+            "description": "Last day of the schedule, inclusive (YYYY-MM-DD)",
+            "type": "string",
+            "format": "date"
+        }
+        props["slot_minutes"] = {
+            "description": "Length of each slot in minutes",
+            "type": "integer",
+            "minimum": 5,
+            "maximum": 1440
+        }
+        props["opening_time"] = {
+            "description": "Daily start of the first slot (HH:MM)",
+            "type": "string",
+            "pattern": "^([01][0-9]|2[0-3]):[0-5][0-9]$"
+        }
+        props["closing_time"] = {
+            "description": "Daily end of the last slot (HH:MM)",
+            "type": "string",
+            "pattern": "^([01][0-9]|2[0-3]):[0-5][0-9]$"
+        }
+        return schema
+
+class Reservation(Serializable, db.Model):
     """Represents a reservation made by a user for a time slot."""
 
     reservation_id = db.Column(db.Integer, primary_key=True)
@@ -195,24 +334,34 @@ class Reservation(db.Model):
         server_default=db.func.current_timestamp(),
         nullable=False
     )
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    updated_at = db.Column(
+        db.DateTime,
+        default=db.func.current_timestamp(),
+        server_default=db.func.current_timestamp(),
+        onupdate=db.func.current_timestamp(),
+        nullable=False
+    )
+
+    __mapper_args__ = {"version_id_col": version}
 
     user = db.relationship(
         'User',
-        backref=db.backref('reservations', lazy=True, passive_deletes=True)
+        backref=db.backref('reservations', lazy=True, passive_deletes="all")
         )
     timeslot = db.relationship(
         'Timeslot',
-        backref=db.backref('reservations', lazy=True, passive_deletes=True)
+        backref=db.backref('reservations', lazy=True, passive_deletes="all")
         )
 
-    def serialize(self):
-        """Return a dictionary representation of the reservation."""
-        return {
-            "reservation_id": self.reservation_id,
-            "user_id": self.user_id,
-            "slot_id": self.slot_id,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-        }
+    serializers = {
+        "reservation_id": attrgetter("reservation_id"),
+        "user_id": attrgetter("user_id"),
+        "slot_id": attrgetter("slot_id"),
+        "created_at": lambda reservation: _isoformat(reservation.created_at),
+        "version": attrgetter("version"),
+        "updated_at": lambda reservation: _isoformat(reservation.updated_at),
+    }
 
     def deserialize(self, doc):
         """Populate the reservation's fields from a dictionary."""
@@ -250,3 +399,50 @@ class Reservation(db.Model):
             "type": "integer"
         }
         return schema
+
+    @staticmethod
+    def batch_schema():
+        """Return the JSON schema for reserving several timeslots in one request."""
+        schema = {
+            "type": "object",
+            "required": ["slot_ids"]
+        }
+        props = schema["properties"] = {}
+        props["slot_ids"] = {
+            "description": "IDs of the timeslots to reserve",
+            "type": "array",
+            "items": {"type": "integer"},
+            "minItems": 1,
+            "maxItems": 100,
+            "uniqueItems": True
+        }
+        props["atomic"] = {
+            "description": "Reserve all slots or none (default) instead of as many as possible",
+            "type": "boolean"
+        }
+        return schema
+
+
+class ChangeLog(db.Model):
+    """Records one create, update or delete of a timeslot or reservation.
+
+    seq is the position in the change feed served at /api/changes.
+    """
+
+    __tablename__ = "change_log"
+
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.Enum('timeslot', 'reservation'), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.Enum('upsert', 'delete'), nullable=False)
+    # No foreign key: tombstones outlive the resource they belonged to.
+    resource_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(
+        db.DateTime,
+        server_default=db.func.current_timestamp(),
+        nullable=False
+    )
+
+    __table_args__ = (
+        db.Index('ix_change_log_entity', 'entity', 'entity_id', 'seq'),
+    )
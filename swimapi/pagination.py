@@ -0,0 +1,82 @@
+"""Keyset (cursor) pagination helpers for collection endpoints."""
+import base64
+import binascii
+
+from flask import request
+from werkzeug.exceptions import BadRequest
+
+from .timing import timed
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key):
+    """Return an opaque cursor string for the given primary key value."""
+    return base64.urlsafe_b64encode(str(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the primary key value encoded in a cursor or raise 400."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise BadRequest(description="Invalid pagination cursor.") from exc
+
+
+def page_limit():
+    """Return the page size requested with ?limit=, bounded to MAX_PAGE_SIZE."""
+    value = request.args.get("limit")
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise BadRequest(description="limit must be a positive integer.")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate(query, key_column):
+    """Return one page of query results and the cursor of the next page.
+
+    Rows are ordered by key_column (an integer primary key) and filtered to
+    those after the ?after= cursor, so each page is an index range scan no
+    matter how deep the client has paged. The cursor is None on the last page.
+    """
+    limit = page_limit()
+    after = request.args.get("after")
+    if after:
+        query = query.filter(key_column > decode_cursor(after))
+
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], key_column.key))
+
+
+def paginate_items(items, key):
+    """Return one page of already serialized items and the cursor of the next page.
+
+    The in-memory counterpart of paginate() for items taken from a cache;
+    items must be sorted by the integer field key.
+    """
+    limit = page_limit()
+    after = request.args.get("after")
+    if after:
+        after = decode_cursor(after)
+        items = [item for item in items if item[key] > after]
+
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1][key])
+
+
+def page_body(rows, next_cursor, fields=None):
+    """Return the JSON body for a page of rows, serialized with the given fields."""
+    with timed("serialization"):
+        return {"items": [row.serialize(fields) for row in rows], "next": next_cursor}
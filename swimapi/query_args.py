@@ -0,0 +1,39 @@
+"""Parsing of typed query string parameters, shared by the collection endpoints."""
+from datetime import datetime
+
+from flask import request
+from werkzeug.exceptions import BadRequest
+
+
+def int_arg(name):
+    """Return an integer query parameter, None if absent, or raise 400."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise BadRequest(description=f"{name} must be an integer.") from exc
+
+
+def datetime_arg(name):
+    """Return an ISO 8601 query parameter as a datetime, None if absent, or raise 400."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise BadRequest(description=f"{name} must be an ISO 8601 date-time.") from exc
+
+
+def bool_arg(name):
+    """Return a true/false query parameter as a bool, None if absent, or raise 400."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if value.lower() in ("true", "1"):
+        return True
+    if value.lower() in ("false", "0"):
+        return False
+    raise BadRequest(description=f"{name} must be true or false.")
@@ -0,0 +1,58 @@
+"""JSON output representation for the flask-restful Api.
+
+With JSON_BACKEND = "orjson" (the default) responses are encoded with orjson
+when it is installed (``pip install -e ".[fast]"``), which is several times
+faster than the stdlib encoder and handles datetime values natively. Without
+orjson, or with JSON_BACKEND = "json", the stdlib encoder is used; datetimes
+are then written with isoformat(), which gives the same output.
+"""
+import json
+from datetime import date
+
+from flask import current_app, make_response
+
+from .timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value):
+    """Encode the values the stdlib encoder does not know like orjson does."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data, pretty=None):
+    """Return data encoded as JSON bytes with the app's JSON_BACKEND, ending in a newline.
+
+    The output is indented if pretty is true, by default in debug mode.
+    """
+    if pretty is None:
+        pretty = current_app.debug
+    if orjson is not None and current_app.config.get("JSON_BACKEND") == "orjson":
+        option = orjson.OPT_APPEND_NEWLINE
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+
+    settings = dict(current_app.config.get("RESTFUL_JSON", {}))
+    if pretty:
+        settings.setdefault("indent", 4)
+    else:
+        settings.pop("indent", None)
+    settings.setdefault("default", _default)
+    return (json.dumps(data, **settings) + "\n").encode()
+
+
+def output_json(data, code, headers=None):
+    """Make a Flask response with a JSON encoded body."""
+    with timed("serialization"):
+        body = dumps(data)
+    response = make_response(body, code)
+    response.mimetype = "application/json"
+    response.headers.extend(headers or {})
+    return response
@@ -0,0 +1,78 @@
+"""Change feed endpoint for clients that mirror timeslots and reservations."""
+from flask_restful import Resource
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from werkzeug.exceptions import BadRequest
+
+from ..models import db, ChangeLog, Reservation, Timeslot  # pylint: disable=relative-beyond-top-level
+from ..pagination import page_limit  # pylint: disable=relative-beyond-top-level
+from ..query_args import int_arg  # pylint: disable=relative-beyond-top-level
+
+
+class ChangeFeed(Resource):
+    """Changes to timeslots and reservations after a sequence number."""
+
+    def get(self):
+        """Return the timeslots and reservations changed after ?since=<seq>.
+
+        Each entity appears once, at the sequence number of its latest change,
+        with its current representation, or with data null and op "delete" if
+        it has been deleted. Pass next_since back as since to continue;
+        has_more tells whether another page is already waiting. An optional
+        resource_id limits the feed to one resource; a timeslot moved away
+        from it, and its reservation, appear there as deleted.
+        """
+        since = int_arg("since") or 0
+        if since < 0:
+            raise BadRequest(description="since must not be negative.")
+        limit = page_limit()
+
+        latest = (
+            select(func.max(ChangeLog.seq))
+            .where(ChangeLog.seq > since)
+            .group_by(ChangeLog.entity, ChangeLog.entity_id)
+        )
+        resource_id = int_arg("resource_id")
+        if resource_id is not None:
+            latest = latest.where(ChangeLog.resource_id == resource_id)
+
+        rows = db.session.scalars(
+            select(ChangeLog).where(ChangeLog.seq.in_(latest))
+            .order_by(ChangeLog.seq).limit(limit + 1)
+        ).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        current = {"timeslot": {}, "reservation": {}}
+        upserts = {"timeslot": [], "reservation": []}
+        for row in rows:
+            if row.op == "upsert":
+                upserts[row.entity].append(row.entity_id)
+        if upserts["timeslot"]:
+            current["timeslot"] = {
+                t.slot_id: t for t in Timeslot.query
+                .options(selectinload(Timeslot.reservations))
+                .filter(Timeslot.slot_id.in_(upserts["timeslot"]))
+            }
+        if upserts["reservation"]:
+            current["reservation"] = {
+                r.reservation_id: r for r in Reservation.query
+                .filter(Reservation.reservation_id.in_(upserts["reservation"]))
+            }
+
+        items = []
+        for row in rows:
+            obj = current[row.entity].get(row.entity_id)
+            items.append({
+                "seq": row.seq,
+                "entity": row.entity,
+                "id": row.entity_id,
+                "op": "upsert" if obj is not None else "delete",
+                "data": obj.serialize() if obj is not None else None,
+            })
+
+        return {
+            "items": items,
+            "next_since": rows[-1].seq if rows else since,
+            "has_more": has_more,
+        }
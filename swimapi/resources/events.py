@@ -0,0 +1,51 @@
+"""Server-Sent Events endpoint streaming live slot availability of a resource."""
+import json
+
+from flask import Response, current_app
+from flask_restful import Resource
+from werkzeug.exceptions import NotFound
+
+from ..models import db, Resource as ResourceModel  # pylint: disable=relative-beyond-top-level
+from ..events import get_broker  # pylint: disable=relative-beyond-top-level
+
+
+def event_stream(broker, channel, subscription, heartbeat):
+    """Yield SSE messages for a subscription until it overflows or the client goes away.
+
+    A comment line is sent every heartbeat seconds without events so proxies
+    keep the connection open and dead clients are noticed. The subscription
+    is removed when the generator is closed.
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while not subscription.overflowed:
+            event = subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        broker.unsubscribe(channel, subscription)
+
+
+class ResourceEvents(Resource):
+    """Live reservation events for one resource."""
+
+    def get(self, resource_id):
+        """Stream reservation.created and reservation.cancelled events as text/event-stream.
+
+        Events are pushed as reservations on the resource's timeslots commit,
+        so watchers need one open connection instead of polling the timeslots.
+        """
+        if db.session.get(ResourceModel, resource_id) is None:
+            raise NotFound(description=f"Resource {resource_id} not found.")
+
+        broker = get_broker()
+        subscription = broker.subscribe(resource_id)
+        stream = event_stream(
+            broker, resource_id, subscription, current_app.config["EVENT_HEARTBEAT"]
+        )
+        return Response(stream, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
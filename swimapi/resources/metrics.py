@@ -0,0 +1,18 @@
+"""Prometheus metrics endpoint."""
+from flask import Response
+from flask_restful import Resource
+
+from ..metrics import collect  # pylint: disable=relative-beyond-top-level
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrics(Resource):
+    """Request, cache and database metrics for a Prometheus scraper."""
+
+    def get(self):
+        """Return the metrics in the Prometheus text exposition format.
+
+        With METRICS_DIR set the values are summed over all worker processes.
+        """
+        return Response(collect(), content_type=CONTENT_TYPE)
@@ -1,21 +1,36 @@
 """Reservation endpoints for managing user reservations on timeslots."""
 from flask import Response, request
 from flask_restful import Resource
-from jsonschema import validate, ValidationError, Draft7Validator
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from werkzeug.exceptions import BadRequest, Conflict, NotFound, UnsupportedMediaType
+from werkzeug.exceptions import Conflict, NotFound, UnsupportedMediaType
 
-from ..models import db, Reservation  # pylint: disable=relative-beyond-top-level
-from ..utils import require_auth, require_admin, get_current_user  # pylint: disable=relative-beyond-top-level
+from ..models import db, insert_if_absent, Reservation, Timeslot  # pylint: disable=relative-beyond-top-level
+from ..utils import require_auth, require_admin, authenticate  # pylint: disable=relative-beyond-top-level
+from ..pagination import paginate, page_body  # pylint: disable=relative-beyond-top-level
+from ..validation import validate_body  # pylint: disable=relative-beyond-top-level
+from ..conditional import conditional_item  # pylint: disable=relative-beyond-top-level
+from ..changes import change, record_changes  # pylint: disable=relative-beyond-top-level
+from ..streaming import stream_rows, wants_stream  # pylint: disable=relative-beyond-top-level
+from ..fields import fields_arg, load_fields  # pylint: disable=relative-beyond-top-level
+from ..metrics import registry  # pylint: disable=relative-beyond-top-level
 
 
 class ReservationCollection(Resource):
     """Operations on the collection of reservations."""
 
     def get(self):
-        """Return a list of all reservations. Requires admin privileges."""
+        """Return a page of reservations, limited to the ?fields= requested.
+
+        Requires admin privileges. With Accept: application/x-ndjson or
+        ?stream=1 all reservations are streamed as NDJSON instead.
+        """
         require_admin()
-        return [r.serialize() for r in Reservation.query.all()]
+        fields = fields_arg(Reservation)
+        query = Reservation.query.options(*load_fields(Reservation, fields))
+        if wants_stream():
+            return stream_rows(query, Reservation.reservation_id, fields)
+        return page_body(*paginate(query, Reservation.reservation_id), fields)
 
     def post(self):
         """Create a new reservation."""
@@ -24,42 +39,121 @@ class ReservationCollection(Resource):
             raise UnsupportedMediaType
 
         # Take user from API key
-        user = get_current_user()
-
-        try:
-            validate(body, Reservation.post_schema(), format_checker=Draft7Validator.FORMAT_CHECKER)
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        user = authenticate()
 
-        reservation = Reservation()
-        reservation.user_id = user.user_id
-        reservation.slot_id = body["slot_id"]
+        validate_body(body, Reservation.post_schema)
 
+        # Claim the slot with one conditional INSERT: when another request has
+        # already reserved it, no row is returned instead of an IntegrityError.
+        stmt = (
+            insert_if_absent(Reservation, Reservation.slot_id)
+            .values(user_id=user.user_id, slot_id=body["slot_id"])
+            .returning(Reservation)
+        )
         try:
-            db.session.add(reservation)
-            db.session.commit()
+            reservation = db.session.scalars(stmt).first()
         except IntegrityError as exc:
             db.session.rollback()
+            registry.inc("swimapi_reservation_conflicts_total")
             raise Conflict(description="This timeslot is already reserved.") from exc
 
-        return reservation.serialize(), 201
+        if reservation is None:
+            db.session.rollback()
+            registry.inc("swimapi_reservation_conflicts_total")
+            raise Conflict(description="This timeslot is already reserved.")
+
+        slot = db.session.execute(
+            select(Timeslot.slot_id, Timeslot.resource_id, Timeslot.start_time)
+            .where(Timeslot.slot_id == reservation.slot_id)
+        ).one()
+        record_changes(db.session, [
+            change("reservation", "upsert", reservation.reservation_id, tuple(slot), created=True)
+        ])
+        body = reservation.serialize()
+        db.session.commit()
+        return body, 201
+
+
+class ReservationBatch(Resource):
+    """Reserve several timeslots for the current user in one transaction."""
+
+    def post(self):
+        """Reserve a list of slots, all-or-nothing unless atomic is false.
+
+        The caller is authenticated once, unknown slots are found with one
+        SELECT and the rest are claimed with one batched INSERT ... ON CONFLICT
+        DO NOTHING against the unique index on Reservation.slot_id. The
+        response lists a status per slot: 201 reserved, 404 no such slot or
+        409 already reserved. An atomic batch with any failure reserves
+        nothing, marks the slots it could have reserved 424 and returns 409;
+        a non-atomic batch returns 200.
+        """
+        body = request.get_json(silent=True)
+        if body is None:
+            raise UnsupportedMediaType
+
+        user = authenticate()
+        validate_body(body, Reservation.batch_schema)
+        slot_ids = body["slot_ids"]
+        atomic = body.get("atomic", True)
+
+        existing = {slot[0]: tuple(slot) for slot in db.session.execute(
+            select(Timeslot.slot_id, Timeslot.resource_id, Timeslot.start_time)
+            .where(Timeslot.slot_id.in_(slot_ids))
+        )}
+        rows = [{"user_id": user.user_id, "slot_id": s} for s in slot_ids if s in existing]
+
+        created = {}
+        if rows:
+            stmt = insert_if_absent(Reservation, Reservation.slot_id).returning(Reservation)
+            try:
+                created = {r.slot_id: r.serialize() for r in db.session.scalars(stmt, rows)}
+            except IntegrityError as exc:
+                db.session.rollback()
+                raise Conflict(description="Some timeslots are already reserved.") from exc
+
+        results = []
+        for slot_id in slot_ids:
+            if slot_id in created:
+                results.append({"slot_id": slot_id, "status": 201, "reservation": created[slot_id]})
+            elif slot_id in existing:
+                results.append({"slot_id": slot_id, "status": 409})
+            else:
+                results.append({"slot_id": slot_id, "status": 404})
+
+        if atomic and len(created) < len(slot_ids):
+            db.session.rollback()
+            for result in results:
+                if result.pop("reservation", None) is not None:
+                    result["status"] = 424
+            return {"results": results}, 409
+
+        record_changes(db.session, [
+            change("reservation", "upsert", r["reservation_id"], existing[slot_id], created=True)
+            for slot_id, r in created.items()
+        ])
+        db.session.commit()
+        return {"results": results}, 201 if atomic else 200
 
 
 class ReservationItem(Resource):
     """Operations on a single reservation."""
 
-    def find_reservation_by_id(self, reservation_id):
-        """Return the reservation with the given ID"""
-        reservation = Reservation.query.get(reservation_id)
+    def find_reservation_by_id(self, reservation_id, options=()):
+        """Return the reservation with the given ID, loaded with options"""
+        reservation = db.session.get(Reservation, reservation_id, options=options)
         if reservation is None:
             raise NotFound(description=f"Reservation {reservation_id} not found.")
         return reservation
 
     def get(self, reservation_id):
         """Return a single reservation by ID. Requires owner or admin."""
-        reservation = self.find_reservation_by_id(reservation_id)
+        fields = fields_arg(Reservation)
+        reservation = self.find_reservation_by_id(
+            reservation_id, load_fields(Reservation, fields, "user_id", "version", "updated_at")
+        )
         require_auth(reservation.user)
-        return reservation.serialize()
+        return conditional_item(reservation, fields=fields)
 
     def delete(self, reservation_id):
         """Delete a reservation. Requires owner or admin."""
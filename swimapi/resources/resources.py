@@ -1,31 +1,46 @@
 """Resource endpoints for managing bookable resources (pools, saunas, gyms)."""
 from flask import Response, request
 from flask_restful import Resource
-from jsonschema import validate, ValidationError, Draft7Validator
 from sqlalchemy.exc import IntegrityError
-from werkzeug.exceptions import Conflict, BadRequest, UnsupportedMediaType, NotFound
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import Conflict, PreconditionFailed, UnsupportedMediaType, NotFound
 
 from ..models import db, Resource as ResourceModel  # pylint: disable=relative-beyond-top-level
 from ..utils import require_admin  # pylint: disable=relative-beyond-top-level
-from ..extensions import cache  # pylint: disable=relative-beyond-top-level
+from ..caching import cached_view, invalidates  # pylint: disable=relative-beyond-top-level
+from ..pagination import paginate, page_body  # pylint: disable=relative-beyond-top-level
+from ..validation import validate_body  # pylint: disable=relative-beyond-top-level
+from ..conditional import require_if_match, version_headers  # pylint: disable=relative-beyond-top-level
+from ..fields import fields_arg, fields_tag, load_fields  # pylint: disable=relative-beyond-top-level
 
-def resource_collection_key():
+def resource_collection_key(*_args, **_kwargs):
     """Generate cache key for the resource collection."""
     return "resource_collection"
 
-def resource_cache_key():
+def resource_cache_key(*_args, **_kwargs):
     """Generate cache key for a specific resource."""
     resource_id = request.view_args.get('resource_id')
     return f"resource_{resource_id}"
 
+@invalidates(ResourceModel)
+def resource_keys(resource):
+    """Return the cache keys that depend on a resource."""
+    return [resource_collection_key(), f"resource_{resource.resource_id}"]
+
+def has_query_args():
+    """Bypass the cache for paginated and sparse requests; only the full first page is cached."""
+    return bool(request.args)
+
 
 class ResourceCollection(Resource):
     """Operations on the collection of bookable resources."""
 
-    @cache.cached(timeout=60, make_cache_key=resource_collection_key)
+    @cached_view("resource_collection", resource_collection_key, unless=has_query_args)
     def get(self):
-        """Return a list of all resources."""
-        return [r.serialize() for r in ResourceModel.query.all()]
+        """Return a page of resources, limited to the ?fields= requested."""
+        fields = fields_arg(ResourceModel)
+        query = ResourceModel.query.options(*load_fields(ResourceModel, fields))
+        return page_body(*paginate(query, ResourceModel.resource_id), fields)
 
     def post(self):
         """Create a new resource. Requires admin privileges."""
@@ -35,20 +50,13 @@ class ResourceCollection(Resource):
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(
-                body, ResourceModel.json_schema(),
-                format_checker=Draft7Validator.FORMAT_CHECKER
-            )
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, ResourceModel.json_schema)
 
         resource = ResourceModel()
         resource.deserialize(body)
 
         db.session.add(resource)
         db.session.commit()
-        cache.delete("resource_collection")
 
         return resource.serialize(), 201
 
@@ -56,34 +64,37 @@ class ResourceCollection(Resource):
 class ResourceItem(Resource):
     """Operations on a single bookable resource."""
 
-    def find_resource_by_id(self, resource_id):
-        """Return the resource with the given ID or raise 404."""
-        resource = ResourceModel.query.get(resource_id)
+    def find_resource_by_id(self, resource_id, options=()):
+        """Return the resource with the given ID, loaded with options, or raise 404."""
+        resource = db.session.get(ResourceModel, resource_id, options=options)
         if resource is None:
             raise NotFound(description=f"Resource {resource_id} not found.")
         return resource
 
-    @cache.cached(timeout=60, make_cache_key=resource_cache_key)
+    @cached_view("resource_item", resource_cache_key, unless=has_query_args)
     def get(self, resource_id):
-        """Return a single resource by ID."""
-        return self.find_resource_by_id(resource_id).serialize()
+        """Return a single resource by ID with its version ETag."""
+        fields = fields_arg(ResourceModel)
+        resource = self.find_resource_by_id(
+            resource_id, load_fields(ResourceModel, fields, "version", "updated_at")
+        )
+        return resource.serialize(fields), 200, version_headers(resource, *fields_tag(fields))
 
     def put(self, resource_id):
-        """Replace an existing resource's data. Requires admin privileges."""
+        """Replace an existing resource's data. Requires admin privileges.
+
+        An If-Match header makes the update conditional on the resource's
+        current version ETag.
+        """
         require_admin()
         resource = self.find_resource_by_id(resource_id)
+        require_if_match(resource)
 
         body = request.get_json(silent=True)
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(
-                body, ResourceModel.json_schema(),
-                format_checker=Draft7Validator.FORMAT_CHECKER
-            )
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, ResourceModel.json_schema)
 
         resource.deserialize(body)
 
@@ -92,9 +103,10 @@ class ResourceItem(Resource):
         except IntegrityError as exc:
             db.session.rollback()
             raise Conflict(description="A resource with these details already exists.") from exc
+        except StaleDataError as exc:
+            db.session.rollback()
+            raise PreconditionFailed(description="The resource was modified concurrently.") from exc
 
-        cache.delete(f"resource_{resource_id}")
-        cache.delete("resource_collection")
         return Response(status=204)
 
     def delete(self, resource_id):
@@ -103,6 +115,4 @@ class ResourceItem(Resource):
         resource = self.find_resource_by_id(resource_id)
         db.session.delete(resource)
         db.session.commit()
-        cache.delete(f"resource_{resource_id}")
-        cache.delete("resource_collection")
         return Response(status=204)
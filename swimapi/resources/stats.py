@@ -0,0 +1,17 @@
+"""Admin endpoint exposing cache statistics."""
+from flask_restful import Resource
+
+from ..caching import cache_stats  # pylint: disable=relative-beyond-top-level
+from ..utils import require_admin  # pylint: disable=relative-beyond-top-level
+
+
+class CacheStats(Resource):
+    """Hit and miss counters of the response caches."""
+
+    def get(self):
+        """Return this worker process's cache hits and misses by namespace.
+
+        Requires admin privileges.
+        """
+        require_admin()
+        return cache_stats.snapshot()
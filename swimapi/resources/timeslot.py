@@ -1,20 +1,164 @@
 """Timeslot endpoints for managing time slots on bookable resources."""
+from datetime import date, datetime, time, timedelta
+from operator import itemgetter
+
 from flask import Response, request
 from flask_restful import Resource
-from jsonschema import validate, ValidationError, Draft7Validator
+from sqlalchemy import exists
 from sqlalchemy.exc import IntegrityError
-from werkzeug.exceptions import BadRequest, Conflict, NotFound, UnsupportedMediaType
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import (
+    BadRequest, Conflict, NotFound, PreconditionFailed, UnsupportedMediaType
+)
 
-from ..models import db, Timeslot  # pylint: disable=relative-beyond-top-level
+from ..models import (  # pylint: disable=relative-beyond-top-level
+    db, insert_if_absent, Reservation, Resource as ResourceModel, Timeslot
+)
 from ..utils import require_admin  # pylint: disable=relative-beyond-top-level
+from ..pagination import paginate, paginate_items, page_body  # pylint: disable=relative-beyond-top-level
+from ..validation import validate_body  # pylint: disable=relative-beyond-top-level
+from ..conditional import (  # pylint: disable=relative-beyond-top-level
+    conditional_response, require_if_match, tag_headers, version_headers
+)
+from ..caching import bucket_key, lookup, store, timeslot_key  # pylint: disable=relative-beyond-top-level
+from ..changes import change, record_changes  # pylint: disable=relative-beyond-top-level
+from ..query_args import bool_arg, datetime_arg, int_arg  # pylint: disable=relative-beyond-top-level
+from ..streaming import stream_rows, wants_stream  # pylint: disable=relative-beyond-top-level
+from ..fields import (  # pylint: disable=relative-beyond-top-level
+    fields_arg, fields_tag, load_fields, trim, wants_field
+)
+
+
+def filter_timeslots(query):
+    """Apply the resource_id, from, to and available query parameters to a query.
+
+    resource_id together with from/to is answered by a range scan over the
+    (resource_id, start_time) index behind uq_timeslot_resource_start, and
+    available is an anti-join against the unique index on Reservation.slot_id.
+    """
+    resource_id = int_arg("resource_id")
+    if resource_id is not None:
+        query = query.filter(Timeslot.resource_id == resource_id)
+
+    start = datetime_arg("from")
+    if start is not None:
+        query = query.filter(Timeslot.start_time >= start)
+
+    end = datetime_arg("to")
+    if end is not None:
+        query = query.filter(Timeslot.start_time < end)
+
+    available = bool_arg("available")
+    if available is not None:
+        reserved = exists().where(Reservation.slot_id == Timeslot.slot_id)
+        query = query.filter(~reserved if available else reserved)
+
+    return query
+
+
+MAX_CACHED_DAYS = 31
+
+
+def is_cacheable_range(resource_id, start, end):
+    """Return True if a listing is for one resource over a short, timezone-naive from/to range."""
+    if resource_id is None or start is None or end is None:
+        return False
+    if start.tzinfo is not None or end.tzinfo is not None:
+        return False
+    return timedelta(0) < end - start <= timedelta(days=MAX_CACHED_DAYS)
+
+
+def days_between(start, end):
+    """Return the dates from start's day to the day of the last instant before end."""
+    day, last = start.date(), (end - timedelta(microseconds=1)).date()
+    days = []
+    while day <= last:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def load_day_buckets(resource_id, days):
+    """Return the serialized timeslots of a resource for each of days, keyed by bucket key.
+
+    All days are loaded with one range query (reservations with one more).
+    """
+    buckets = {bucket_key(resource_id, day): [] for day in days}
+    query = (
+        Timeslot.query.options(selectinload(Timeslot.reservations))
+        .filter(Timeslot.resource_id == resource_id)
+        .filter(Timeslot.start_time >= datetime.combine(days[0], time.min))
+        .filter(Timeslot.start_time < datetime.combine(days[-1] + timedelta(days=1), time.min))
+        .order_by(Timeslot.slot_id)
+    )
+    for timeslot in query:
+        key = bucket_key(resource_id, timeslot.start_time.date())
+        if key in buckets:
+            buckets[key].append(timeslot.serialize())
+    return buckets
+
+
+def cached_listing(resource_id, start, end, fields=None):
+    """Return a page of one resource's timeslots in [start, end) built from per-day buckets.
+
+    Buckets missing from the cache are loaded together and stored; the page is
+    then filtered by time and availability, paginated in memory and trimmed
+    to fields.
+    """
+    days = days_between(start, end)
+    keys = [bucket_key(resource_id, day) for day in days]
+    found, generations = lookup("timeslot_list", keys)
+    missing = [day for day, key in zip(days, keys) if key not in found]
+    if missing:
+        loaded = load_day_buckets(resource_id, missing)
+        store(loaded, generations)
+        found.update(loaded)
+
+    available = bool_arg("available")
+    items = []
+    for key in keys:
+        for item in found[key]:
+            if not start <= datetime.fromisoformat(item["start_time"]) < end:
+                continue
+            if available is not None and (item["reservation"] is None) != available:
+                continue
+            items.append(item)
+    items.sort(key=itemgetter("slot_id"))
+
+    items, next_cursor = paginate_items(items, "slot_id")
+    items = [trim(item, fields) for item in items]
+    return {"items": items, "next": next_cursor}, 200, {"X-Cache": "MISS" if missing else "HIT"}
 
 
 class TimeslotCollection(Resource):
     """Operations on the collection of timeslots."""
 
     def get(self):
-        """Return a list of all timeslots."""
-        return [t.serialize() for t in Timeslot.query.all()]
+        """Return a page of timeslots, optionally filtered by resource, time and availability.
+
+        A listing of one resource over a from/to range of up to MAX_CACHED_DAYS
+        days is served from the per-day cache (X-Cache: HIT or MISS). Other
+        listings fetch reservations with a single select-in query so
+        serializing the page does not issue one extra SELECT per timeslot.
+        With Accept: application/x-ndjson or ?stream=1 every matching
+        timeslot is streamed as NDJSON instead, bypassing the cache.
+        Reservations are not loaded unless ?fields= includes reservation.
+        """
+        fields = fields_arg(Timeslot)
+        query = Timeslot.query.options(*load_fields(Timeslot, fields))
+        if wants_field(fields, "reservation"):
+            query = query.options(selectinload(Timeslot.reservations))
+        if wants_stream():
+            return stream_rows(filter_timeslots(query), Timeslot.slot_id, fields)
+
+        resource_id = int_arg("resource_id")
+        start, end = datetime_arg("from"), datetime_arg("to")
+        if is_cacheable_range(resource_id, start, end):
+            return cached_listing(resource_id, start, end, fields)
+
+        query = filter_timeslots(query)
+        return page_body(*paginate(query, Timeslot.slot_id), fields)
 
     def post(self):
         """Create a new timeslot. Requires admin privileges."""
@@ -24,10 +168,7 @@ class TimeslotCollection(Resource):
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(body, Timeslot.json_schema(), format_checker=Draft7Validator.FORMAT_CHECKER)
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, Timeslot.json_schema)
 
         timeslot = Timeslot()
         timeslot.deserialize(body)
@@ -42,33 +183,61 @@ class TimeslotCollection(Resource):
         return timeslot.serialize(), 201
 
 
+def reservation_tag(timeslot):
+    """Return the ETag part for the reservation embedded in a timeslot's representation."""
+    reservation = timeslot.reservations[0] if timeslot.reservations else None
+    return f"r{reservation.reservation_id if reservation else 0}"
+
+
 class TimeslotItem(Resource):
     """Operations on a single timeslot."""
 
     def find_timeslot_by_id(self, slot_id):
         """Return the timeslot with the given ID"""
-        timeslot = Timeslot.query.get(slot_id)
+        timeslot = db.session.get(
+            Timeslot, slot_id, options=[joinedload(Timeslot.reservations)]
+        )
         if timeslot is None:
             raise NotFound(description=f"Timeslot {slot_id} not found.")
         return timeslot
 
     def get(self, slot_id):
-        """Return a single timeslot by ID."""
-        return self.find_timeslot_by_id(slot_id).serialize()
+        """Return a single timeslot by ID, or 304 if the client's ETag is current.
+
+        The representation and its headers are cached until the timeslot or
+        its reservation changes (X-Cache: HIT or MISS); a ?fields= request is
+        answered by trimming the cached representation.
+        """
+        fields = fields_arg(Timeslot)
+        key = timeslot_key(slot_id)
+        found, generations = lookup("timeslot_item", [key])
+        if key in found:
+            body, headers = found[key]
+            cache_status = "HIT"
+        else:
+            timeslot = self.find_timeslot_by_id(slot_id)
+            body = timeslot.serialize()
+            headers = version_headers(timeslot, reservation_tag(timeslot))
+            store({key: (body, headers)}, generations)
+            cache_status = "MISS"
+        headers = tag_headers(headers, *fields_tag(fields))
+        return conditional_response(trim(body, fields), {**headers, "X-Cache": cache_status})
 
     def put(self, slot_id):
-        """Replace an existing timeslot's data. Requires admin privileges."""
+        """Replace an existing timeslot's data. Requires admin privileges.
+
+        An If-Match header makes the update conditional on the timeslot's
+        current ETag.
+        """
         require_admin()
         timeslot = self.find_timeslot_by_id(slot_id)
+        require_if_match(timeslot, reservation_tag(timeslot))
 
         body = request.get_json(silent=True)
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(body, Timeslot.json_schema(), format_checker=Draft7Validator.FORMAT_CHECKER)
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, Timeslot.json_schema)
 
         timeslot.deserialize(body)
 
@@ -77,6 +246,9 @@ class TimeslotItem(Resource):
         except IntegrityError as exc:
             db.session.rollback()
             raise Conflict(description="Failed to update timeslot due to a conflict.") from exc
+        except StaleDataError as exc:
+            db.session.rollback()
+            raise PreconditionFailed(description="The timeslot was modified concurrently.") from exc
 
         return Response(status=204)
 
@@ -87,3 +259,83 @@ class TimeslotItem(Resource):
         db.session.delete(timeslot)
         db.session.commit()
         return Response(status=204)
+
+
+MAX_BULK_SLOTS = 50000
+
+
+def expand_schedule(doc):
+    """Yield (start_time, end_time) pairs for a bulk schedule document.
+
+    Every day from start_date to end_date (inclusive) is split into back-to-back
+    slots of slot_minutes, starting at opening_time and ending no later than
+    closing_time.
+    """
+    first_day = date.fromisoformat(doc["start_date"])
+    last_day = date.fromisoformat(doc["end_date"])
+    opening = time.fromisoformat(doc["opening_time"])
+    closing = time.fromisoformat(doc["closing_time"])
+    slot_len = timedelta(minutes=doc["slot_minutes"])
+
+    day = first_day
+    while day <= last_day:
+        start = datetime.combine(day, opening)
+        day_end = datetime.combine(day, closing)
+        while start + slot_len <= day_end:
+            yield start, start + slot_len
+            start += slot_len
+        day += timedelta(days=1)
+
+
+class TimeslotBulk(Resource):
+    """Generate a recurring schedule of timeslots in one request."""
+
+    def post(self):
+        """Create every slot of a schedule for a resource. Requires admin privileges.
+
+        The schedule is expanded server-side and inserted in one transaction
+        with a single batched INSERT ... ON CONFLICT DO NOTHING, so slots that
+        already exist (same resource_id and start_time) are skipped.
+        """
+        require_admin()
+
+        body = request.get_json(silent=True)
+        if not body:
+            raise UnsupportedMediaType
+
+        validate_body(body, Timeslot.bulk_schema)
+        if body["start_date"] > body["end_date"]:
+            raise BadRequest(description="start_date must not be after end_date.")
+        if body["opening_time"] >= body["closing_time"]:
+            raise BadRequest(description="opening_time must be before closing_time.")
+
+        resource_id = body["resource_id"]
+        if db.session.get(ResourceModel, resource_id) is None:
+            raise NotFound(description=f"Resource {resource_id} not found.")
+
+        rows = []
+        for start, end in expand_schedule(body):
+            rows.append({"resource_id": resource_id, "start_time": start, "end_time": end})
+            if len(rows) > MAX_BULK_SLOTS:
+                raise BadRequest(
+                    description=f"A schedule may create at most {MAX_BULK_SLOTS} slots."
+                )
+
+        created = []
+        try:
+            if rows:
+                stmt = (
+                    insert_if_absent(Timeslot, Timeslot.resource_id, Timeslot.start_time)
+                    .returning(Timeslot.slot_id, Timeslot.start_time)
+                )
+                created = db.session.execute(stmt, rows).all()
+            record_changes(db.session, [
+                change("timeslot", "upsert", slot_id, (slot_id, resource_id, start), created=True)
+                for slot_id, start in created
+            ])
+            db.session.commit()
+        except IntegrityError as exc:
+            db.session.rollback()
+            raise Conflict(description="Failed to create timeslots due to a conflict.") from exc
+
+        return {"created": len(created), "skipped": len(rows) - len(created)}, 201
@@ -2,20 +2,26 @@
 import secrets
 from flask import Response, request
 from flask_restful import Resource
-from jsonschema import validate, ValidationError, Draft7Validator
 from sqlalchemy.exc import IntegrityError
-from werkzeug.exceptions import Conflict, BadRequest, UnsupportedMediaType, NotFound
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import Conflict, PreconditionFailed, UnsupportedMediaType, NotFound
 
 from ..models import db, User  # pylint: disable=relative-beyond-top-level
-from ..utils import require_auth  # pylint: disable=relative-beyond-top-level
+from ..utils import auth_cache, require_auth  # pylint: disable=relative-beyond-top-level
+from ..pagination import paginate, page_body  # pylint: disable=relative-beyond-top-level
+from ..validation import validate_body  # pylint: disable=relative-beyond-top-level
+from ..conditional import conditional_item, require_if_match  # pylint: disable=relative-beyond-top-level
+from ..fields import fields_arg, load_fields  # pylint: disable=relative-beyond-top-level
 
 
 class UserCollection(Resource):
     """Operations on the collection of users."""
 
     def get(self):
-        """Return a list of all users."""
-        return [u.serialize() for u in User.query.all()]
+        """Return a page of users, limited to the ?fields= requested."""
+        fields = fields_arg(User)
+        query = User.query.options(*load_fields(User, fields))
+        return page_body(*paginate(query, User.user_id), fields)
 
     def post(self):
         """Create a new user and return it with api_key."""
@@ -23,10 +29,7 @@ class UserCollection(Resource):
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(body, User.json_schema(), format_checker=Draft7Validator.FORMAT_CHECKER)
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, User.json_schema)
 
         user = User(api_key=secrets.token_hex(32))
         user.deserialize(body)
@@ -48,30 +51,34 @@ class UserCollection(Resource):
 class UserItem(Resource):
     """Operations on a single user."""
 
-    def find_user_by_id(self, user_id):
-        """Return the user with the given ID or raise 404."""
-        user = User.query.get(user_id)
+    def find_user_by_id(self, user_id, options=()):
+        """Return the user with the given ID, loaded with options, or raise 404."""
+        user = db.session.get(User, user_id, options=options)
         if user is None:
             raise NotFound(description=f"User {user_id} not found.")
         return user
 
     def get(self, user_id):
-        """Return a single user by ID."""
-        return self.find_user_by_id(user_id).serialize()
+        """Return a single user by ID, or 304 if the client's ETag is current."""
+        fields = fields_arg(User)
+        user = self.find_user_by_id(user_id, load_fields(User, fields, "version", "updated_at"))
+        return conditional_item(user, fields=fields)
 
     def put(self, user_id):
-        """Replace an existing user's data."""
+        """Replace an existing user's data.
+
+        An If-Match header makes the update conditional on the user's current
+        version ETag.
+        """
         user = self.find_user_by_id(user_id)
         require_auth(user)
+        require_if_match(user)
 
         body = request.get_json(silent=True)
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(body, User.json_schema(), format_checker=Draft7Validator.FORMAT_CHECKER)
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, User.json_schema)
 
         user.deserialize(body)
 
@@ -82,15 +89,21 @@ class UserItem(Resource):
             raise Conflict(
                 description=f"User with email '{body['email']}' already exists."
             ) from exc
+        except StaleDataError as exc:
+            db.session.rollback()
+            raise PreconditionFailed(description="The user was modified concurrently.") from exc
 
+        auth_cache.invalidate(user.api_key_hash)
         return Response(status=204)
 
     def delete(self, user_id):
         """Delete a user by ID."""
         user = self.find_user_by_id(user_id)
         require_auth(user)
+        api_key_hash = user.api_key_hash
         db.session.delete(user)
         db.session.commit()
+        auth_cache.invalidate(api_key_hash)
         return Response(status=204)
 
 
@@ -103,10 +116,7 @@ class AdminUserCollection(Resource):
         if not body:
             raise UnsupportedMediaType
 
-        try:
-            validate(body, User.json_schema(), format_checker=Draft7Validator.FORMAT_CHECKER)
-        except ValidationError as e:
-            raise BadRequest(description=str(e)) from e
+        validate_body(body, User.json_schema)
 
         user = User(api_key=secrets.token_hex(32), user_type="admin")
         user.deserialize(body)
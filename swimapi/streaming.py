@@ -0,0 +1,40 @@
+"""Streaming NDJSON exports of collection endpoints.
+
+A client asks for a stream with ``Accept: application/x-ndjson`` or
+``?stream=1``. The whole (filtered) collection is then sent as one JSON
+object per line, written while the query is still being read in batches, so
+memory use and time to the first byte do not depend on the number of rows.
+"""
+from flask import Response, request, stream_with_context
+
+from .pagination import decode_cursor
+from .representations import dumps
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream():
+    """Return True if the request asks for an NDJSON stream instead of a page."""
+    if request.args.get("stream", "").lower() in ("1", "true"):
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_rows(query, key_column, fields=None):
+    """Return a streamed NDJSON response with the rows of query, serialized with fields.
+
+    Rows are ordered by key_column and fetched STREAM_BATCH_SIZE at a time;
+    an ?after= cursor resumes an interrupted export.
+    """
+    after = request.args.get("after")
+    if after:
+        query = query.filter(key_column > decode_cursor(after))
+    query = query.order_by(key_column).yield_per(STREAM_BATCH_SIZE)
+
+    def generate():
+        for row in query:
+            yield dumps(row.serialize(fields), pretty=False)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,122 @@
+"""Opt-in per-request timing: a Server-Timing header and a log line per request.
+
+With SERVER_TIMING enabled, each request records the number of SQL statements
+and the time spent executing them (from engine events), the time spent in
+timed() sections (validation and serialization) and the total time until the
+response is returned by the view. The figures are sent as a Server-Timing
+header and logged as one JSON object on the "swimapi.timing" logger. Streamed
+bodies are produced after that point and are not included.
+
+When disabled no hooks are registered, and timed() costs one lookup on g.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+from .models import db
+
+logger = logging.getLogger("swimapi.timing")
+
+_TIMING = "swimapi_timing"
+
+
+class RequestTiming:
+    """Accumulated durations (seconds) and the SQL statement count of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float, db=0.0)
+        self.statements = 0
+
+    def add(self, name, seconds):
+        """Add seconds to the duration of a named section."""
+        self.durations[name] += seconds
+
+    def header(self, total):
+        """Return the Server-Timing header value, durations in milliseconds."""
+        db_ms = self.durations["db"] * 1e3
+        metrics = [f'db;desc="{self.statements} statement(s)";dur={db_ms:.2f}']
+        metrics.extend(
+            f"{name};dur={seconds * 1e3:.2f}"
+            for name, seconds in self.durations.items() if name != "db"
+        )
+        metrics.append(f"total;dur={total * 1e3:.2f}")
+        return ", ".join(metrics)
+
+
+def current_timing():
+    """Return the RequestTiming of the current request, or None if timing is off."""
+    return g.get(_TIMING) if has_app_context() else None
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the with block to the current request's named section."""
+    timing = current_timing()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+def _start_timing():
+    setattr(g, _TIMING, RequestTiming())
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    if current_timing() is not None:
+        conn.info.setdefault("swimapi_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    timing = current_timing()
+    starts = conn.info.get("swimapi_query_start")
+    if timing is not None and starts:
+        timing.add("db", time.perf_counter() - starts.pop())
+        timing.statements += 1
+
+
+def _finish_timing(response):
+    """Add the Server-Timing header and log the request's timings."""
+    timing = g.pop(_TIMING, None)
+    if timing is None:
+        return response
+    total = time.perf_counter() - timing.started
+    response.headers["Server-Timing"] = timing.header(total)
+    logger.info(json.dumps({
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "sql_statements": timing.statements,
+        **{f"{name}_ms": round(seconds * 1e3, 3) for name, seconds in timing.durations.items()},
+        "total_ms": round(total * 1e3, 3),
+    }))
+    return response
+
+
+def init_timing(app):
+    """Register the timing hooks if SERVER_TIMING is enabled (default off).
+
+    Call before other after_request hooks are registered, so the response is
+    timed after all of them.
+    """
+    app.config.setdefault("SERVER_TIMING", False)
+    if not app.config["SERVER_TIMING"]:
+        return
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,9 +1,79 @@
 """Utility functions for authentication and authorization."""
 import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
 
-from flask import request
+from flask import g, request
 from werkzeug.exceptions import Forbidden
-from .models import User
+from .models import API_KEY_PREFIX_LENGTH, db, hash_api_key, User
+
+AuthenticatedUser = namedtuple("AuthenticatedUser", ["user_id", "user_type"])
+
+
+class ApiKeyCache:
+    """In-process LRU cache mapping API key hashes to AuthenticatedUser entries.
+
+    Entries expire after a TTL so changes made by other worker processes are
+    picked up eventually; changes made through this process are invalidated
+    explicitly.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure size and TTL from AUTH_CACHE_SIZE / AUTH_CACHE_TTL and clear the cache."""
+        self.maxsize = app.config.setdefault("AUTH_CACHE_SIZE", 1024)
+        self.ttl = app.config.setdefault("AUTH_CACHE_TTL", 60)
+        self.clear()
+        app.before_request(_reset_request_auth)
+
+    def get(self, api_key):
+        """Return the cached entry for api_key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(api_key)
+            if entry is None:
+                return None
+            principal, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[api_key]
+                return None
+            self._entries.move_to_end(api_key)
+            return principal
+
+    def set(self, api_key, principal):
+        """Cache principal for api_key, evicting the least recently used entry when full."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[api_key] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(api_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, api_key):
+        """Drop the entry for api_key if present."""
+        with self._lock:
+            self._entries.pop(api_key, None)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+auth_cache = ApiKeyCache()
+
+
+def _reset_request_auth():
+    """Forget the memoized user, since an app context (and its g) may span several requests."""
+    g.pop("principal", None)
+    g.pop("current_user", None)
+
 
 def require_auth(user):
     """Verify that the request's API key matches the given user.
@@ -12,24 +82,71 @@ def require_auth(user):
     token = request.headers.get("swimapi-api-key", "")
     if not token:
         raise Forbidden(description="Missing swimapi-api-key header.")
-    if not secrets.compare_digest(token, user.api_key or ""):
+    if not secrets.compare_digest(hash_api_key(token), user.api_key_hash or ""):
         raise Forbidden(description="Invalid API key.")
 
 
-def get_current_user():
-    """Return the User matching the API key in the request header"""
+def find_user_by_api_key(api_key):
+    """Return the User owning a plaintext API key, or None.
+
+    The indexed lookup uses only the non-secret key prefix; the stored hashes of
+    the few matching rows are then compared in constant time.
+    """
+    key_hash = hash_api_key(api_key)
+    candidates = User.query.filter_by(api_key_prefix=api_key[:API_KEY_PREFIX_LENGTH])
+    for user in candidates:
+        if secrets.compare_digest(key_hash, user.api_key_hash or ""):
+            return user
+    return None
+
+
+def authenticate():
+    """Return the AuthenticatedUser for the API key in the request header.
+
+    The result is memoized on flask.g for the rest of the request and cached in
+    auth_cache across requests, so repeated authentication does not hit the
+    database.
+    """
+    principal = g.get("principal")
+    if principal is not None:
+        return principal
+
     token = request.headers.get("swimapi-api-key", "")
     if not token:
         raise Forbidden(description="Missing swimapi-api-key header.")
-    user = User.query.filter_by(api_key=token).first()
+
+    key_hash = hash_api_key(token)
+    principal = auth_cache.get(key_hash)
+    if principal is None:
+        user = find_user_by_api_key(token)
+        if user is None:
+            raise Forbidden(description="Invalid API key.")
+        principal = AuthenticatedUser(user.user_id, user.user_type)
+        auth_cache.set(key_hash, principal)
+
+    g.principal = principal
+    return principal
+
+
+def get_current_user():
+    """Return the User matching the API key in the request header"""
+    user = g.get("current_user")
+    if user is not None:
+        return user
+
+    principal = authenticate()
+    user = db.session.get(User, principal.user_id)
     if user is None:
+        auth_cache.invalidate(hash_api_key(request.headers.get("swimapi-api-key", "")))
         raise Forbidden(description="Invalid API key.")
+
+    g.current_user = user
     return user
 
 
 def require_admin():
-    """Look up the user by the API key in the request header and verify they are an admin."""
-    user = get_current_user()
-    if user.user_type != "admin":
+    """Authenticate the API key in the request header and verify it belongs to an admin."""
+    principal = authenticate()
+    if principal.user_type != "admin":
         raise Forbidden(description="Admin privileges required.")
-    return user
+    return principal
@@ -0,0 +1,48 @@
+"""Precompiled JSON schema validators for request bodies."""
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import best_match
+from werkzeug.exceptions import BadRequest
+
+from .models import User, Resource, Timeslot, Reservation
+from .timing import timed
+
+SCHEMAS = (
+    User.json_schema,
+    Resource.json_schema,
+    Timeslot.json_schema,
+    Timeslot.bulk_schema,
+    Reservation.json_schema,
+    Reservation.post_schema,
+    Reservation.batch_schema,
+)
+
+_validators = {}
+
+
+def get_validator(schema_fn):
+    """Return the cached Draft7Validator for a model schema function.
+
+    The schema is built and checked only the first time; later calls reuse the
+    same validator and its format checker.
+    """
+    validator = _validators.get(schema_fn)
+    if validator is None:
+        schema = schema_fn()
+        Draft7Validator.check_schema(schema)
+        validator = Draft7Validator(schema, format_checker=Draft7Validator.FORMAT_CHECKER)
+        _validators[schema_fn] = validator
+    return validator
+
+
+def init_validators():
+    """Build the validators for all registered schemas at app start."""
+    for schema_fn in SCHEMAS:
+        get_validator(schema_fn)
+
+
+def validate_body(body, schema_fn):
+    """Validate a request body against a model schema or raise 400."""
+    with timed("validation"):
+        error = best_match(get_validator(schema_fn).iter_errors(body))
+    if error is not None:
+        raise BadRequest(description=str(error))
@@ -76,12 +76,10 @@ def _populate_db():  # pylint: disable=too-many-locals
 @pytest.fixture
 def client():
     """Yield a Flask test client with a fresh in-memory database."""
-    app = create_app()
-    app.config.update(
-        TESTING=True,
-        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
-        SQLALCHEMY_TRACK_MODIFICATIONS=False,
-    )
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    })
 
     ctx = app.app_context()
     ctx.push()
@@ -101,9 +99,7 @@ def client():
 @pytest.fixture
 def bare_client():
     """Yield a Flask test client with a fresh empty in-memory DB (no prepopulated data)."""
-    app = create_app()
-    app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
 
     ctx = app.app_context()
     ctx.push()
@@ -117,3 +113,41 @@ def bare_client():
     db.drop_all()
     db.session.remove()
     ctx.pop()
+
+
+@pytest.fixture
+def app_factory():
+    """Return a function creating a testing app on an empty in-memory DB with extra config.
+
+    For tests that need settings other than the defaults, or several apps.
+    """
+    def factory(**config):
+        return create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            **config,
+        })
+    return factory
+
+
+@pytest.fixture
+def file_client(tmp_path):
+    """Yield a Flask test client on a populated SQLite file database.
+
+    Unlike the in-memory fixtures, every thread gets its own connection, so this
+    fixture suits concurrency tests.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLITE_PROFILE": "performance",
+    })
+
+    with app.app_context():
+        _populate_db()
+        db.session.remove()
+
+    yield app.test_client()
+
+    with app.app_context():
+        db.engine.dispose()
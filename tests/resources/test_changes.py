@@ -0,0 +1,166 @@
+"""Tests for the /api/changes feed."""
+import json
+
+from swimapi.models import ChangeLog, Reservation, Timeslot
+
+ADMIN = {"swimapi-api-key": "admin-api-key"}
+RESOURCE_URL = "/api/changes"
+
+
+def _head(client):
+    """Return the current end of the change feed."""
+    with client.application.app_context():
+        return max(c.seq for c in ChangeLog.query)
+
+
+def _changes(client, since, **params):
+    """Return the feed items after since as (entity, id, op) tuples."""
+    resp = client.get(RESOURCE_URL, query_string={"since": since, **params})
+    assert resp.status_code == 200
+    return [(i["entity"], i["id"], i["op"]) for i in json.loads(resp.data)["items"]]
+
+
+def _reserved_slot(client):
+    """Return (slot_id, reservation_id, resource_id) of a reserved timeslot."""
+    with client.application.app_context():
+        reservation = Reservation.query.first()
+        return reservation.slot_id, reservation.reservation_id, reservation.timeslot.resource_id
+
+
+class TestChangeFeed:
+    """Tests for the change feed endpoint."""
+
+    def test_initial_feed(self, client):
+        """since=0 lists every timeslot and reservation once."""
+        resp = client.get(RESOURCE_URL, query_string={"limit": 1000})
+        assert resp.status_code == 200
+        data = json.loads(resp.data)
+        assert len(data["items"]) == 280 + 12
+        assert data["has_more"] is False
+        assert data["next_since"] == _head(client)
+        first = data["items"][0]
+        assert first["op"] == "upsert"
+        assert first["data"]["slot_id"] == first["id"]
+
+    def test_paging(self, client):
+        """next_since and has_more walk the feed page by page."""
+        data = json.loads(client.get(RESOURCE_URL, query_string={"limit": 200}).data)
+        assert data["has_more"] is True
+        assert len(data["items"]) == 200
+        rest = json.loads(client.get(
+            RESOURCE_URL, query_string={"since": data["next_since"], "limit": 200}
+        ).data)
+        assert rest["has_more"] is False
+        assert len(rest["items"]) == 92
+
+    def test_nothing_new(self, client):
+        """A client at the head gets no items and keeps its position."""
+        head = _head(client)
+        data = json.loads(client.get(RESOURCE_URL, query_string={"since": head}).data)
+        assert data["items"] == []
+        assert data["next_since"] == head
+
+    def test_new_reservation(self, client):
+        """A reservation made through the API is the only change after it."""
+        head = _head(client)
+        with client.application.app_context():
+            reserved = {r.slot_id for r in Reservation.query}
+            slot_id = Timeslot.query.filter(~Timeslot.slot_id.in_(reserved)).first().slot_id
+        resp = client.post(
+            "/api/reservations", json={"slot_id": slot_id},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        reservation_id = json.loads(resp.data)["reservation_id"]
+        assert _changes(client, head) == [("reservation", reservation_id, "upsert")]
+
+    def test_timeslot_update_collapses(self, client):
+        """Two updates of one timeslot show up as a single latest change."""
+        head = _head(client)
+        body = {"resource_id": 1, "start_time": "2027-01-01T08:00:00",
+                "end_time": "2027-01-01T09:30:00"}
+        client.put("/api/timeslots/2", json=body, headers=ADMIN)
+        body["end_time"] = "2027-01-01T10:00:00"
+        client.put("/api/timeslots/2", json=body, headers=ADMIN)
+        resp = client.get(RESOURCE_URL, query_string={"since": head})
+        items = json.loads(resp.data)["items"]
+        assert [(i["entity"], i["id"], i["op"]) for i in items] == [("timeslot", 2, "upsert")]
+        assert items[0]["data"]["end_time"] == "2027-01-01T10:00:00"
+
+    def test_reservation_delete_tombstone(self, client):
+        """Cancelling a reservation leaves a tombstone."""
+        head = _head(client)
+        _, reservation_id, _ = _reserved_slot(client)
+        resp = client.delete(
+            f"/api/reservations/{reservation_id}",
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 204
+        resp = client.get(RESOURCE_URL, query_string={"since": head})
+        items = json.loads(resp.data)["items"]
+        assert items == [{"seq": items[0]["seq"], "entity": "reservation",
+                          "id": reservation_id, "op": "delete", "data": None}]
+
+    def test_timeslot_delete_cascades(self, client):
+        """Deleting a reserved timeslot leaves tombstones for it and its reservation."""
+        head = _head(client)
+        slot_id, reservation_id, _ = _reserved_slot(client)
+        resp = client.delete(f"/api/timeslots/{slot_id}", headers=ADMIN)
+        assert resp.status_code == 204
+        assert sorted(_changes(client, head)) == [
+            ("reservation", reservation_id, "delete"), ("timeslot", slot_id, "delete")
+        ]
+
+    def test_resource_delete_cascades(self, client):
+        """Deleting a resource leaves tombstones for all of its timeslots and reservations."""
+        head = _head(client)
+        with client.application.app_context():
+            slots = Timeslot.query.filter_by(resource_id=1).count()
+            reservations = Reservation.query.join(Timeslot).filter(
+                Timeslot.resource_id == 1
+            ).count()
+        client.delete("/api/resources/1", headers=ADMIN)
+        changes = _changes(client, head, limit=1000)
+        assert len(changes) == slots + reservations
+        assert {op for _, _, op in changes} == {"delete"}
+
+    def test_bulk_schedule(self, client):
+        """Timeslots generated in bulk appear in the feed."""
+        head = _head(client)
+        client.post("/api/timeslots/bulk", headers=ADMIN, json={
+            "resource_id": 2, "start_date": "2027-03-01", "end_date": "2027-03-01",
+            "slot_minutes": 60, "opening_time": "08:00", "closing_time": "12:00",
+        })
+        changes = _changes(client, head, resource_id=2)
+        assert [(e, op) for e, _, op in changes] == [("timeslot", "upsert")] * 4
+
+    def test_resource_filter(self, client):
+        """resource_id limits the feed to one resource."""
+        resp = client.get(RESOURCE_URL, query_string={"resource_id": 3, "limit": 1000})
+        items = json.loads(resp.data)["items"]
+        assert items
+        assert {i["data"]["resource_id"] for i in items if i["entity"] == "timeslot"} == {3}
+
+    def test_resource_move_tombstones(self, client):
+        """A timeslot moved to another resource leaves the old resource's feed."""
+        head = _head(client)
+        slot_id, reservation_id, resource_id = _reserved_slot(client)
+        new_resource_id = 1 if resource_id != 1 else 2
+        resp = client.put(f"/api/timeslots/{slot_id}", headers=ADMIN, json={
+            "resource_id": new_resource_id, "start_time": "2027-01-01T08:00:00",
+            "end_time": "2027-01-01T09:00:00",
+        })
+        assert resp.status_code == 204
+        assert sorted(_changes(client, head, resource_id=resource_id)) == [
+            ("reservation", reservation_id, "delete"), ("timeslot", slot_id, "delete")
+        ]
+        assert sorted(_changes(client, head, resource_id=new_resource_id)) == [
+            ("reservation", reservation_id, "upsert"), ("timeslot", slot_id, "upsert")
+        ]
+        assert sorted(_changes(client, head)) == [
+            ("reservation", reservation_id, "upsert"), ("timeslot", slot_id, "upsert")
+        ]
+
+    def test_invalid_since(self, client):
+        """A non-integer or negative since returns 400."""
+        assert client.get(RESOURCE_URL, query_string={"since": "x"}).status_code == 400
+        assert client.get(RESOURCE_URL, query_string={"since": -1}).status_code == 400
@@ -1,5 +1,6 @@
 """Tests for the reservation resource."""
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 from swimapi.models import Timeslot, Reservation
 
@@ -19,17 +20,48 @@ class TestReservationCollection:
     RESOURCE_URL = "/api/reservations"
 
     def test_get_as_admin(self, client):
-        """GET with admin key should return 200 and a list."""
+        """GET with admin key should return 200 and a page."""
         resp = client.get(self.RESOURCE_URL, headers={"swimapi-api-key": "admin-api-key"})
         assert resp.status_code == 200
         data = json.loads(resp.data)
-        assert isinstance(data, list)
+        assert isinstance(data["items"], list)
+        assert "next" in data
+
+    def test_get_fields(self, client):
+        """?fields= should trim reservations in pages and streams."""
+        headers = {"swimapi-api-key": "admin-api-key"}
+        resp = client.get(f"{self.RESOURCE_URL}?fields=slot_id", headers=headers)
+        assert all(set(r) == {"slot_id"} for r in json.loads(resp.data)["items"])
+        resp = client.get(f"{self.RESOURCE_URL}?fields=slot_id&stream=1", headers=headers)
+        assert all(set(json.loads(line)) == {"slot_id"} for line in resp.data.splitlines())
 
     def test_get_not_admin(self, client):
         """GET with a non-admin key should return 403."""
         resp = client.get(self.RESOURCE_URL, headers={"swimapi-api-key": "customer-api-key1"})
         assert resp.status_code == 403
 
+    def test_get_stream(self, client):
+        """Accept: application/x-ndjson should stream every reservation, resumable with after."""
+        headers = {"swimapi-api-key": "admin-api-key", "Accept": "application/x-ndjson"}
+        resp = client.get(self.RESOURCE_URL, headers=headers)
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+        items = [json.loads(line) for line in resp.data.splitlines()]
+        assert len(items) == 12
+
+        page = json.loads(client.get(
+            f"{self.RESOURCE_URL}?limit=5", headers={"swimapi-api-key": "admin-api-key"}
+        ).data)
+        resp = client.get(f"{self.RESOURCE_URL}?after={page['next']}", headers=headers)
+        assert [json.loads(line) for line in resp.data.splitlines()] == items[5:]
+
+    def test_get_stream_not_admin(self, client):
+        """Streaming should require admin privileges too."""
+        resp = client.get(
+            f"{self.RESOURCE_URL}?stream=1", headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 403
+
     def test_post_valid(self, client):
         """POST with a valid slot_id should return 201 and the new reservation."""
         slot_id = _free_slot_id(client)
@@ -82,6 +114,36 @@ class TestReservationCollection:
         )
         assert resp.status_code == 409
 
+    def test_post_missing_slot(self, client):
+        """POST for a timeslot that does not exist should return 409."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            json={"slot_id": 999999},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 409
+
+    def test_post_concurrent_single_winner(self, file_client):
+        """Hundreds of concurrent POSTs for one slot should produce exactly one reservation."""
+        slot_id = _free_slot_id(file_client)
+        app = file_client.application
+
+        def _reserve(i):
+            resp = app.test_client().post(
+                self.RESOURCE_URL,
+                json={"slot_id": slot_id},
+                headers={"swimapi-api-key": f"customer-api-key{i % 4 + 1}"}
+            )
+            return resp.status_code
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            statuses = list(pool.map(_reserve, range(200)))
+
+        assert statuses.count(201) == 1
+        assert statuses.count(409) == 199
+        with app.app_context():
+            assert Reservation.query.filter_by(slot_id=slot_id).count() == 1
+
 
 class TestReservationItem:
     """Tests for the /api/reservations/<id> item endpoint."""
@@ -104,6 +166,12 @@ class TestReservationItem:
         body = json.loads(resp.data)
         assert body["reservation_id"] == rid
 
+        resp = client.get(
+            f"/api/reservations/{rid}?fields=slot_id",
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert json.loads(resp.data) == {"slot_id": slot_id}
+
     def test_get_wrong_key(self, client):
         """GET with a different user's key should return 403."""
         slot_id = _free_slot_id(client)
@@ -172,3 +240,97 @@ class TestReservationItem:
             headers={"swimapi-api-key": "customer-api-key1"}
         )
         assert resp.status_code == 404
+
+
+class TestReservationBatch:
+    """Tests for the /api/reservations/batch endpoint."""
+    RESOURCE_URL = "/api/reservations/batch"
+
+    @staticmethod
+    def _free_slot_ids(client, count):
+        with client.application.app_context():
+            reserved = Reservation.query.with_entities(Reservation.slot_id)
+            slots = Timeslot.query.filter(~Timeslot.slot_id.in_(reserved)).limit(count)
+            return [t.slot_id for t in slots]
+
+    def test_post_atomic(self, client):
+        """An atomic batch of free slots should reserve all of them."""
+        slot_ids = self._free_slot_ids(client, 3)
+        resp = client.post(
+            self.RESOURCE_URL,
+            json={"slot_ids": slot_ids},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 201
+        results = json.loads(resp.data)["results"]
+        assert [r["status"] for r in results] == [201, 201, 201]
+        assert [r["reservation"]["slot_id"] for r in results] == slot_ids
+        with client.application.app_context():
+            assert Reservation.query.filter(Reservation.slot_id.in_(slot_ids)).count() == 3
+
+    def test_post_atomic_conflict(self, client):
+        """An atomic batch with one taken slot should reserve nothing."""
+        free = self._free_slot_ids(client, 2)
+        with client.application.app_context():
+            taken = Reservation.query.first().slot_id
+
+        resp = client.post(
+            self.RESOURCE_URL,
+            json={"slot_ids": [*free, taken, 999999]},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 409
+        results = json.loads(resp.data)["results"]
+        assert [r["status"] for r in results] == [424, 424, 409, 404]
+        with client.application.app_context():
+            assert Reservation.query.filter(Reservation.slot_id.in_(free)).count() == 0
+
+    def test_post_best_effort(self, client):
+        """A non-atomic batch should keep the slots it could reserve."""
+        free = self._free_slot_ids(client, 2)
+        with client.application.app_context():
+            taken = Reservation.query.first().slot_id
+
+        resp = client.post(
+            self.RESOURCE_URL,
+            json={"slot_ids": [taken, *free], "atomic": False},
+            headers={"swimapi-api-key": "customer-api-key2"}
+        )
+        assert resp.status_code == 200
+        results = json.loads(resp.data)["results"]
+        assert [r["status"] for r in results] == [409, 201, 201]
+        with client.application.app_context():
+            assert Reservation.query.filter(Reservation.slot_id.in_(free)).count() == 2
+
+    def test_post_best_effort_unknown_slots(self, client):
+        """A non-atomic batch of unknown slots should report 404 for each."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            json={"slot_ids": [999998, 999999], "atomic": False},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 200
+        assert [r["status"] for r in json.loads(resp.data)["results"]] == [404, 404]
+
+    def test_post_invalid(self, client):
+        """Empty or duplicate slot lists should return 400."""
+        for body in ({"slot_ids": []}, {"slot_ids": [1, 1]}, {}):
+            resp = client.post(
+                self.RESOURCE_URL, json=body, headers={"swimapi-api-key": "customer-api-key1"}
+            )
+            assert resp.status_code == 400
+
+    def test_post_no_api_key(self, client):
+        """POST without an API key should return 403."""
+        resp = client.post(self.RESOURCE_URL, json={"slot_ids": [1]})
+        assert resp.status_code == 403
+
+    def test_post_wrong_content_type(self, client):
+        """POST with a non-JSON content type should return 415."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            data="{}",
+            content_type="text/plain",
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 415
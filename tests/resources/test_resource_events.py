@@ -0,0 +1,109 @@
+"""Tests for the Server-Sent Events stream of a resource."""
+import json
+
+import pytest
+
+from swimapi.models import Reservation, Timeslot
+
+RESOURCE_URL = "/api/resources/{}/events"
+
+
+def _next_event(chunks):
+    """Return (event type, data) of the next SSE event, skipping comments and hints."""
+    for chunk in chunks:
+        lines = chunk.decode().strip().splitlines()
+        if lines and lines[0].startswith("event: "):
+            return lines[0][len("event: "):], json.loads(lines[1][len("data: "):])
+    raise AssertionError("stream ended")
+
+
+@pytest.fixture
+def free_slot(client):
+    """Return (slot_id, resource_id) of a timeslot without a reservation."""
+    with client.application.app_context():
+        reserved = {r.slot_id for r in Reservation.query}
+        slot = Timeslot.query.filter(~Timeslot.slot_id.in_(reserved)).first()
+        return slot.slot_id, slot.resource_id
+
+
+class TestResourceEvents:
+    """Tests for /api/resources/<resource_id>/events."""
+
+    def test_stream_headers(self, client):
+        """The stream is text/event-stream, uncached and not ETagged."""
+        resp = client.get(RESOURCE_URL.format(1))
+        assert resp.status_code == 200
+        assert resp.mimetype == "text/event-stream"
+        assert resp.headers["Cache-Control"] == "no-cache"
+        assert "ETag" not in resp.headers
+        assert next(resp.iter_encoded()) == b"retry: 3000\n\n"
+        resp.close()
+
+    def test_unknown_resource(self, client):
+        """A stream for a missing resource returns 404."""
+        assert client.get(RESOURCE_URL.format(999)).status_code == 404
+
+    def test_created_and_cancelled(self, client, free_slot):
+        """A reservation made and cancelled on the resource is pushed to the stream."""
+        slot_id, resource_id = free_slot
+        resp = client.get(RESOURCE_URL.format(resource_id))
+        chunks = resp.iter_encoded()
+        next(chunks)
+
+        created = client.post(
+            "/api/reservations", json={"slot_id": slot_id},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        reservation_id = json.loads(created.data)["reservation_id"]
+        event, data = _next_event(chunks)
+        assert event == "reservation.created"
+        assert data == {"reservation_id": reservation_id, "slot_id": slot_id,
+                        "resource_id": resource_id, "type": "reservation.created"}
+
+        client.delete(
+            f"/api/reservations/{reservation_id}",
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        event, data = _next_event(chunks)
+        assert event == "reservation.cancelled"
+        assert data["slot_id"] == slot_id
+        resp.close()
+
+    def test_other_resource_not_pushed(self, client, free_slot):
+        """Events of other resources are not sent; a heartbeat is sent instead."""
+        client.application.config["EVENT_HEARTBEAT"] = 0.01
+        slot_id, resource_id = free_slot
+        other = resource_id % 5 + 1
+        resp = client.get(RESOURCE_URL.format(other))
+        chunks = resp.iter_encoded()
+        next(chunks)
+        client.post(
+            "/api/reservations", json={"slot_id": slot_id},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert next(chunks) == b": keep-alive\n\n"
+        resp.close()
+
+    def test_close_unsubscribes(self, client):
+        """Closing the response removes the subscriber."""
+        broker = client.application.extensions["swimapi_broker"]
+        resp = client.get(RESOURCE_URL.format(1))
+        next(resp.iter_encoded())
+        assert broker.subscriber_count(1) == 1
+        resp.close()
+        assert broker.subscriber_count(1) == 0
+
+    def test_rollback_not_pushed(self, client, free_slot):
+        """A failed atomic batch publishes nothing."""
+        client.application.config["EVENT_HEARTBEAT"] = 0.01
+        slot_id, resource_id = free_slot
+        resp = client.get(RESOURCE_URL.format(resource_id))
+        chunks = resp.iter_encoded()
+        next(chunks)
+        batch = client.post(
+            "/api/reservations/batch", json={"slot_ids": [slot_id, 9999]},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert batch.status_code == 409
+        assert next(chunks) == b": keep-alive\n\n"
+        resp.close()
@@ -1,8 +1,11 @@
 """Tests for the resource endpoints."""
 import json
 
+from swimapi.extensions import cache
 from swimapi.models import db, Resource
-from swimapi.resources.resources import resource_collection_key, resource_cache_key
+from swimapi.resources.resources import (
+    resource_cache_key, resource_collection_key, resource_keys
+)
 from flask import request as flask_request
 
 def _get_resource_json(name="Test Pool", resource_type="pool"):
@@ -23,17 +26,75 @@ class TestCacheKeyFunctions:
             flask_request.view_args = {"resource_id": 42}
             assert resource_cache_key() == "resource_42"
 
+    def test_resource_keys(self):
+        """resource_keys should name the collection and the item."""
+        resource = Resource(resource_id=3, name="Pool", resource_type="pool")
+        assert resource_keys(resource) == ["resource_collection", "resource_3"]
+
+
+class TestCacheInvalidation:
+    """Cached resource reads are invalidated by model hooks when writes commit."""
+    ADMIN = {"swimapi-api-key": "admin-api-key"}
+
+    def test_cache_status_header(self, client):
+        """Resource reads report whether they were served from the cache."""
+        assert client.get("/api/resources/1").headers["X-Cache"] == "MISS"
+        assert client.get("/api/resources/1").headers["X-Cache"] == "HIT"
+        assert "X-Cache" not in client.get("/api/resources?limit=2").headers
+
+    def test_post_invalidates_cached_404(self, client):
+        """Creating a resource replaces a cached 404 for its ID."""
+        assert client.get("/api/resources/6").status_code == 404
+        client.get("/api/resources")
+        resp = client.post("/api/resources", json=_get_resource_json(), headers=self.ADMIN)
+        assert json.loads(resp.data)["resource_id"] == 6
+        assert client.get("/api/resources/6").status_code == 200
+        assert len(client.get("/api/resources").get_json()["items"]) == 6
+
+    def test_put_invalidates_item_and_collection(self, client):
+        """Updating a resource refreshes both cached representations."""
+        client.get("/api/resources/1")
+        client.get("/api/resources")
+        client.put("/api/resources/1", headers=self.ADMIN,
+                   json=_get_resource_json(name="Renamed Pool"))
+        assert client.get("/api/resources/1").get_json()["name"] == "Renamed Pool"
+        names = [r["name"] for r in client.get("/api/resources").get_json()["items"]]
+        assert "Renamed Pool" in names
+
+    def test_delete_invalidates_cascaded_timeslots(self, client):
+        """Deleting a resource invalidates the cached timeslots it cascades to."""
+        url = ("/api/timeslots?resource_id=1&from=2026-02-22T00:00:00"
+               "&to=2026-02-23T00:00:00")
+        slot_id = client.get(url).get_json()["items"][0]["slot_id"]
+        assert client.get(f"/api/timeslots/{slot_id}").status_code == 200
+        client.get("/api/resources/1")
+
+        client.delete("/api/resources/1", headers=self.ADMIN)
+        assert client.get("/api/resources/1").status_code == 404
+        assert client.get(url).get_json()["items"] == []
+        assert client.get(f"/api/timeslots/{slot_id}").status_code == 404
+
+    def test_rollback_keeps_cache(self, client):
+        """A write that is rolled back invalidates nothing."""
+        client.get("/api/resources/1")
+        with client.application.app_context():
+            db.session.get(Resource, 1).name = "Never Committed"
+            db.session.flush()
+            db.session.rollback()
+            assert cache.get("resource_1") is not None
+
 
 class TestResourceCollection:
     """Tests for the /api/resources collection endpoint."""
     RESOURCE_URL = "/api/resources"
 
     def test_get(self, client):
-        """GET should return 200 and a list of resources."""
+        """GET should return 200 and a page of resources."""
         resp = client.get(self.RESOURCE_URL)
         assert resp.status_code == 200
         data = json.loads(resp.data)
-        assert isinstance(data, list)
+        assert isinstance(data["items"], list)
+        assert "next" in data
 
     def test_post_valid_request(self, client):
         """POST with valid JSON and admin key should return 201 and the new resource."""
@@ -91,6 +152,19 @@ class TestResourceItem:
         assert body["resource_id"] == rid
         assert body["name"] == name
 
+    def test_get_fields(self, client):
+        """?fields= should trim the resource and bypass the cache."""
+        client.get("/api/resources/1")
+        resp = client.get("/api/resources/1?fields=name,resource_type")
+        assert resp.status_code == 200
+        assert "X-Cache" not in resp.headers
+        assert set(json.loads(resp.data)) == {"name", "resource_type"}
+        assert resp.headers["ETag"] != client.get("/api/resources/1").headers["ETag"]
+
+        resp = client.get("/api/resources?fields=resource_id")
+        assert all(set(r) == {"resource_id"} for r in json.loads(resp.data)["items"])
+        assert client.get("/api/resources/1?fields=owner").status_code == 400
+
     def test_get_missing(self, client):
         """GET for a nonexistent ID should return 404."""
         resp = client.get("/api/resources/999999")
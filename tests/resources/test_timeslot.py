@@ -1,8 +1,27 @@
 """Tests for the timeslot endpoints."""
 import json
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
 
 from swimapi.models import Resource, db, Timeslot
+from swimapi.resources.timeslot import filter_timeslots
+
+
+@contextmanager
+def _count_queries():
+    """Yield a list that collects every SQL statement executed on the engine."""
+    statements = []
+
+    def _before_execute(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before_execute)
 
 
 class TestTimeslotCollection:
@@ -10,11 +29,152 @@ class TestTimeslotCollection:
     RESOURCE_URL = "/api/timeslots"
 
     def test_get(self, client):
-        """GET should return 200 and a list of timeslots."""
+        """GET should return 200 and a page of timeslots."""
         resp = client.get(self.RESOURCE_URL)
         assert resp.status_code == 200
         data = json.loads(resp.data)
-        assert isinstance(data, list)
+        assert isinstance(data["items"], list)
+        assert "next" in data
+
+    def test_get_query_count_is_constant(self, client):
+        """GET should not issue one reservation SELECT per timeslot (no N+1)."""
+        with _count_queries() as before:
+            resp = client.get(f"{self.RESOURCE_URL}?limit=1000")
+        assert resp.status_code == 200
+
+        with client.application.app_context():
+            resource_id = Resource.query.first().resource_id
+            base = datetime(2031, 1, 1, 8, 0)
+            db.session.add_all([
+                Timeslot(
+                    resource_id=resource_id,
+                    start_time=base + i * timedelta(hours=1),
+                    end_time=base + (i + 1) * timedelta(hours=1),
+                )
+                for i in range(50)
+            ])
+            db.session.commit()
+
+        with _count_queries() as after:
+            resp = client.get(f"{self.RESOURCE_URL}?limit=1000")
+        assert resp.status_code == 200
+        assert len(json.loads(resp.data)["items"]) == 330
+        assert len(after) == len(before)
+
+    def test_get_pages(self, client):
+        """Following next cursors should visit every timeslot exactly once."""
+        seen = []
+        url = f"{self.RESOURCE_URL}?limit=100"
+        while url:
+            data = json.loads(client.get(url).data)
+            seen.extend(t["slot_id"] for t in data["items"])
+            url = data["next"] and f"{self.RESOURCE_URL}?limit=100&after={data['next']}"
+        assert len(seen) == 280
+        assert seen == sorted(set(seen))
+
+    def test_get_filtered_by_resource_and_time(self, client):
+        """resource_id, from and to should restrict the listing to that range."""
+        with client.application.app_context():
+            resource_id = Resource.query.first().resource_id
+
+        resp = client.get(
+            f"{self.RESOURCE_URL}?resource_id={resource_id}"
+            "&from=2026-02-22T00:00:00&to=2026-02-23T00:00:00"
+        )
+        assert resp.status_code == 200
+        items = json.loads(resp.data)["items"]
+        assert len(items) == 8
+        assert all(t["resource_id"] == resource_id for t in items)
+        assert all(t["start_time"].startswith("2026-02-22") for t in items)
+
+    def test_get_available(self, client):
+        """available=true should only return slots without a reservation."""
+        resp = client.get(f"{self.RESOURCE_URL}?available=true&limit=1000")
+        items = json.loads(resp.data)["items"]
+        assert len(items) == 280 - 12
+        assert all(t["reservation"] is None for t in items)
+
+        resp = client.get(f"{self.RESOURCE_URL}?available=false")
+        items = json.loads(resp.data)["items"]
+        assert len(items) == 12
+        assert all(t["reservation"] is not None for t in items)
+
+    def test_get_stream(self, client):
+        """?stream=1 should stream every matching timeslot as one JSON object per line."""
+        resp = client.get(f"{self.RESOURCE_URL}?stream=1&available=false")
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+        assert resp.is_streamed
+        assert "ETag" not in resp.headers
+        items = [json.loads(line) for line in resp.data.splitlines()]
+        assert len(items) == 12
+        assert all(t["reservation"] is not None for t in items)
+        assert [t["slot_id"] for t in items] == sorted(t["slot_id"] for t in items)
+
+    def test_get_stream_accept(self, client):
+        """Accept: application/x-ndjson should stream the whole collection, bypassing the cache."""
+        resp = client.get(
+            f"{self.RESOURCE_URL}?resource_id=1&from=2026-02-22T00:00:00&to=2026-02-23T00:00:00",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        assert resp.mimetype == "application/x-ndjson"
+        assert "X-Cache" not in resp.headers
+        assert len(resp.data.splitlines()) == 8
+
+        resp = client.get(self.RESOURCE_URL, headers={"Accept": "application/x-ndjson"})
+        assert len(resp.data.splitlines()) == 280
+
+    def test_get_stream_invalid_filters(self, client):
+        """Malformed filters should still return 400 before streaming starts."""
+        resp = client.get(f"{self.RESOURCE_URL}?stream=1&from=yesterday")
+        assert resp.status_code == 400
+
+    def test_get_fields(self, client):
+        """?fields= should trim the items and skip loading reservations and other columns."""
+        with _count_queries() as statements:
+            resp = client.get(f"{self.RESOURCE_URL}?fields=slot_id,start_time&limit=1000")
+        assert resp.status_code == 200
+        items = json.loads(resp.data)["items"]
+        assert len(items) == 280
+        assert all(set(t) == {"slot_id", "start_time"} for t in items)
+        assert len(statements) == 1
+        assert "end_time" not in statements[0]
+
+        resp = client.get(f"{self.RESOURCE_URL}?fields=slot_id,reservation&available=false")
+        items = json.loads(resp.data)["items"]
+        assert all(set(t) == {"slot_id", "reservation"} and t["reservation"] for t in items)
+
+    def test_get_fields_cached_listing(self, client):
+        """A cached listing should be trimmed to the requested fields."""
+        url = (f"{self.RESOURCE_URL}?resource_id=1"
+               "&from=2026-02-22T00:00:00&to=2026-02-23T00:00:00")
+        full = json.loads(client.get(url).data)["items"]
+        resp = client.get(f"{url}&fields=slot_id,reservation")
+        assert resp.headers["X-Cache"] == "HIT"
+        assert json.loads(resp.data)["items"] == [
+            {"slot_id": t["slot_id"], "reservation": t["reservation"]} for t in full
+        ]
+
+    def test_get_invalid_filters(self, client):
+        """Malformed filter values should return 400."""
+        for query in ("resource_id=abc", "from=yesterday", "to=2026-13-01", "available=maybe",
+                      "fields=slot_id,owner"):
+            resp = client.get(f"{self.RESOURCE_URL}?{query}")
+            assert resp.status_code == 400
+
+    def test_availability_query_uses_index(self, client):
+        """The availability query should be an index range scan plus an indexed anti-join."""
+        with client.application.test_request_context(
+            "/?resource_id=1&from=2026-02-21T00:00:00&to=2026-02-22T00:00:00&available=true"
+        ):
+            query = filter_timeslots(Timeslot.query)
+            sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            plan = " ".join(
+                row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"))
+            )
+        assert "SEARCH timeslot USING INDEX" in plan
+        assert "resource_id=? AND start_time>? AND start_time<?" in plan
+        assert "SEARCH reservation USING INDEX" in plan
 
     def test_post_valid_request(self, client):
         """POST with valid JSON and admin key should return 201 and the new timeslot."""
@@ -94,6 +254,33 @@ class TestTimeslotItem:
         assert body["slot_id"] == sid
         assert body["resource_id"] == resource_id
 
+    def test_get_single_query(self, client):
+        """GET should load the timeslot and its reservation in one statement."""
+        with client.application.app_context():
+            sid = Timeslot.query.first().slot_id
+
+        with _count_queries() as statements:
+            resp = client.get(f"/api/timeslots/{sid}")
+        assert resp.status_code == 200
+        assert len(statements) == 1
+
+    def test_get_fields(self, client):
+        """?fields= should trim the cached representation and get an ETag of its own."""
+        full = client.get("/api/timeslots/1")
+        resp = client.get("/api/timeslots/1?fields=slot_id,start_time")
+        assert resp.status_code == 200
+        assert resp.headers["X-Cache"] == "HIT"
+        assert json.loads(resp.data) == {
+            "slot_id": 1, "start_time": json.loads(full.data)["start_time"]
+        }
+        assert resp.headers["ETag"] != full.headers["ETag"]
+
+        resp = client.get("/api/timeslots/1?fields=slot_id,start_time",
+                          headers={"If-None-Match": resp.headers["ETag"]})
+        assert resp.status_code == 304
+        resp = client.get("/api/timeslots/1", headers={"If-None-Match": resp.headers["ETag"]})
+        assert resp.status_code == 200
+
     def test_get_missing(self, client):
         """GET for a nonexistent ID should return 404."""
         resp = client.get("/api/timeslots/999999")
@@ -222,3 +409,252 @@ class TestTimeslotItem:
             headers={"swimapi-api-key": "admin-api-key"}
         )
         assert resp.status_code == 404
+
+
+class TestTimeslotBulk:
+    """Tests for the /api/timeslots/bulk schedule endpoint."""
+    RESOURCE_URL = "/api/timeslots/bulk"
+
+    @staticmethod
+    def _schedule(resource_id, **overrides):
+        doc = {
+            "resource_id": resource_id,
+            "start_date": "2027-06-01",
+            "end_date": "2027-06-07",
+            "slot_minutes": 30,
+            "opening_time": "06:00",
+            "closing_time": "22:00",
+        }
+        doc.update(overrides)
+        return doc
+
+    def test_post_creates_schedule(self, client):
+        """A week of 30-minute slots from 6 to 22 should create 7 * 32 slots."""
+        with client.application.app_context():
+            resource_id = Resource.query.first().resource_id
+
+        resp = client.post(
+            self.RESOURCE_URL,
+            json=self._schedule(resource_id),
+            headers={"swimapi-api-key": "admin-api-key"}
+        )
+        assert resp.status_code == 201
+        assert json.loads(resp.data) == {"created": 224, "skipped": 0}
+
+        with client.application.app_context():
+            slots = Timeslot.query.filter(
+                Timeslot.resource_id == resource_id,
+                Timeslot.start_time >= datetime(2027, 6, 1),
+            ).order_by(Timeslot.start_time).all()
+            assert len(slots) == 224
+            assert slots[0].start_time == datetime(2027, 6, 1, 6, 0)
+            assert slots[-1].end_time == datetime(2027, 6, 7, 22, 0)
+
+    def test_post_skips_existing(self, client):
+        """Slots that already exist should be skipped, not duplicated."""
+        with client.application.app_context():
+            resource_id = Resource.query.first().resource_id
+
+        schedule = self._schedule(resource_id, end_date="2027-06-01")
+        headers = {"swimapi-api-key": "admin-api-key"}
+        client.post(self.RESOURCE_URL, json=schedule, headers=headers)
+        schedule["end_date"] = "2027-06-02"
+        resp = client.post(self.RESOURCE_URL, json=schedule, headers=headers)
+        assert resp.status_code == 201
+        assert json.loads(resp.data) == {"created": 32, "skipped": 32}
+
+    def test_post_single_statement(self, client):
+        """The whole schedule should be inserted with one INSERT statement.
+
+        The only other INSERT is the single change log write of record_changes().
+        """
+        with client.application.app_context():
+            resource_id = Resource.query.first().resource_id
+
+        with _count_queries() as statements:
+            client.post(
+                self.RESOURCE_URL,
+                json=self._schedule(resource_id, slot_minutes=15),
+                headers={"swimapi-api-key": "admin-api-key"}
+            )
+        inserts = [s for s in statements if s.startswith("INSERT")]
+        assert len([s for s in inserts if s.startswith("INSERT INTO timeslot ")]) == 1
+        assert len([s for s in inserts if s.startswith("INSERT INTO change_log ")]) == 1
+        assert len(inserts) == 2
+
+    def test_post_empty_schedule(self, client):
+        """A window shorter than one slot should create nothing."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            json=self._schedule(1, opening_time="06:00", closing_time="06:20"),
+            headers={"swimapi-api-key": "admin-api-key"}
+        )
+        assert resp.status_code == 201
+        assert json.loads(resp.data) == {"created": 0, "skipped": 0}
+
+    def test_post_not_admin(self, client):
+        """POST with a non-admin key should return 403."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            json=self._schedule(1),
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 403
+
+    def test_post_invalid(self, client):
+        """Invalid schedules should return 400."""
+        headers = {"swimapi-api-key": "admin-api-key"}
+        for overrides in (
+            {"slot_minutes": 0},
+            {"opening_time": "6am"},
+            {"start_date": "2027-06-08"},
+            {"opening_time": "22:00", "closing_time": "06:00"},
+            {"start_date": "2020-01-01", "end_date": "2030-01-01", "slot_minutes": 5},
+        ):
+            resp = client.post(
+                self.RESOURCE_URL, json=self._schedule(1, **overrides), headers=headers
+            )
+            assert resp.status_code == 400
+
+    def test_post_missing_resource(self, client):
+        """A schedule for a nonexistent resource should return 404."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            json=self._schedule(999999),
+            headers={"swimapi-api-key": "admin-api-key"}
+        )
+        assert resp.status_code == 404
+
+    def test_post_wrong_content_type(self, client):
+        """POST with a non-JSON content type should return 415."""
+        resp = client.post(
+            self.RESOURCE_URL,
+            data="{}",
+            content_type="text/plain",
+            headers={"swimapi-api-key": "admin-api-key"}
+        )
+        assert resp.status_code == 415
+
+
+class TestTimeslotCache:
+    """Tests for the cached timeslot listing and item reads."""
+    DAY_URL = "/api/timeslots?resource_id=1&from=2026-02-22T00:00:00&to=2026-02-23T00:00:00"
+
+    def _reserve(self, client, slot_id):
+        resp = client.post(
+            "/api/reservations", json={"slot_id": slot_id},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert resp.status_code == 201
+        return json.loads(resp.data)["reservation_id"]
+
+    def test_listing_hit_after_miss(self, client):
+        """The second identical day listing is served from the cache without SQL."""
+        first = client.get(self.DAY_URL)
+        assert first.headers["X-Cache"] == "MISS"
+        with _count_queries() as statements:
+            second = client.get(self.DAY_URL)
+        assert second.headers["X-Cache"] == "HIT"
+        assert statements == []
+        assert second.get_json() == first.get_json()
+
+    def test_listing_matches_database(self, client):
+        """Cached pages, filters and cursors match the uncached listing."""
+        url = ("/api/timeslots?resource_id=2&from=2026-02-21T12:00:00"
+               "&to=2026-02-25T12:00:00&limit=5")
+        client.get(url)
+        cached = client.get(url).get_json()
+        with client.application.app_context():
+            expected = (Timeslot.query.filter_by(resource_id=2)
+                        .filter(Timeslot.start_time >= datetime(2026, 2, 21, 12))
+                        .filter(Timeslot.start_time < datetime(2026, 2, 25, 12))
+                        .order_by(Timeslot.slot_id).limit(5).all())
+            assert [t["slot_id"] for t in cached["items"]] == [t.slot_id for t in expected]
+        page2 = client.get(f"{url}&after={cached['next']}").get_json()
+        assert page2["items"][0]["slot_id"] > cached["items"][-1]["slot_id"]
+
+    def test_listing_invalidated_by_reservation(self, client):
+        """Reserving and cancelling a slot invalidates its day bucket."""
+        client.get(self.DAY_URL)
+        slot_id = client.get(self.DAY_URL + "&available=true").get_json()["items"][0]["slot_id"]
+        reservation_id = self._reserve(client, slot_id)
+
+        resp = client.get(self.DAY_URL + "&available=false")
+        assert resp.headers["X-Cache"] == "MISS"
+        assert slot_id in [t["slot_id"] for t in resp.get_json()["items"]]
+
+        client.delete(f"/api/reservations/{reservation_id}",
+                      headers={"swimapi-api-key": "customer-api-key1"})
+        resp = client.get(self.DAY_URL + "&available=false")
+        assert slot_id not in [t["slot_id"] for t in resp.get_json()["items"]]
+
+    def test_other_buckets_kept(self, client):
+        """A write only invalidates the buckets it touches."""
+        other_day = self.DAY_URL.replace("22T", "24T").replace("23T", "25T")
+        client.get(self.DAY_URL)
+        client.get(other_day)
+        slot_id = client.get(self.DAY_URL).get_json()["items"][0]["slot_id"]
+        self._reserve(client, slot_id)
+        assert client.get(other_day).headers["X-Cache"] == "HIT"
+        assert client.get(self.DAY_URL).headers["X-Cache"] == "MISS"
+
+    def test_moved_timeslot_leaves_old_bucket(self, client):
+        """Moving a timeslot to another day invalidates both days."""
+        items = client.get(self.DAY_URL).get_json()["items"]
+        moved = items[0]
+        client.put(f"/api/timeslots/{moved['slot_id']}",
+                   headers={"swimapi-api-key": "admin-api-key"},
+                   json={"resource_id": 1, "start_time": "2026-03-10T08:00:00",
+                         "end_time": "2026-03-10T09:30:00"})
+        items = client.get(self.DAY_URL).get_json()["items"]
+        assert moved["slot_id"] not in [t["slot_id"] for t in items]
+
+    def test_uncacheable_listings_bypass(self, client):
+        """Listings without one resource and a bounded range are not cached."""
+        assert "X-Cache" not in client.get("/api/timeslots").headers
+        resp = client.get("/api/timeslots?resource_id=1&from=2026-01-01T00:00:00"
+                          "&to=2026-06-01T00:00:00")
+        assert "X-Cache" not in resp.headers
+
+    def test_item_hit_and_invalidation(self, client):
+        """A timeslot is cached until its reservation changes."""
+        slot_id = client.get(self.DAY_URL + "&available=true").get_json()["items"][0]["slot_id"]
+        first = client.get(f"/api/timeslots/{slot_id}")
+        assert first.headers["X-Cache"] == "MISS"
+        second = client.get(f"/api/timeslots/{slot_id}")
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["ETag"] == first.headers["ETag"]
+
+        not_modified = client.get(f"/api/timeslots/{slot_id}",
+                                  headers={"If-None-Match": first.headers["ETag"]})
+        assert not_modified.status_code == 304
+
+        self._reserve(client, slot_id)
+        third = client.get(f"/api/timeslots/{slot_id}")
+        assert third.headers["X-Cache"] == "MISS"
+        assert third.get_json()["reservation"] is not None
+        assert third.headers["ETag"] != first.headers["ETag"]
+
+    def test_item_deleted(self, client):
+        """A deleted timeslot is not served from the cache."""
+        client.get("/api/timeslots/5")
+        client.delete("/api/timeslots/5", headers={"swimapi-api-key": "admin-api-key"})
+        assert client.get("/api/timeslots/5").status_code == 404
+
+    def test_stats(self, client):
+        """The admin stats endpoint reports hits and misses."""
+        before = client.get("/api/admin/cache-stats",
+                            headers={"swimapi-api-key": "admin-api-key"}).get_json()
+        client.get(self.DAY_URL)
+        client.get(self.DAY_URL)
+        after = client.get("/api/admin/cache-stats",
+                           headers={"swimapi-api-key": "admin-api-key"}).get_json()
+        listing_before = before.get("timeslot_list", {"hits": 0, "misses": 0})
+        assert after["timeslot_list"]["hits"] == listing_before["hits"] + 1
+        assert after["timeslot_list"]["misses"] == listing_before["misses"] + 1
+
+    def test_stats_not_admin(self, client):
+        """The stats endpoint requires admin privileges."""
+        resp = client.get("/api/admin/cache-stats",
+                          headers={"swimapi-api-key": "customer-api-key1"})
+        assert resp.status_code == 403
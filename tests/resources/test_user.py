@@ -13,11 +13,12 @@ class TestUserCollection:
     RESOURCE_URL = "/api/users"
 
     def test_get(self, client):
-        """GET should return 200 and a list of users."""
+        """GET should return 200 and a page of users."""
         resp = client.get(self.RESOURCE_URL)
         assert resp.status_code == 200
         data = json.loads(resp.data)
-        assert isinstance(data, list)
+        assert isinstance(data["items"], list)
+        assert "next" in data
 
     def test_post_valid_request(self, client):
         """POST with valid JSON should return 201 and the new user."""
@@ -61,6 +62,19 @@ class TestUserCollection:
         body = json.loads(resp.data)
         assert body["email"] == "alice@example.com"
 
+    def test_get_fields(self, client):
+        """?fields= should trim the user and its ETag should tell it from the full one."""
+        full = client.get("/api/users/1")
+        resp = client.get("/api/users/1?fields=user_id,name")
+        assert json.loads(resp.data) == {"user_id": 1, "name": json.loads(full.data)["name"]}
+        assert resp.headers["ETag"] != full.headers["ETag"]
+        resp = client.get("/api/users/1?fields=user_id,name",
+                          headers={"If-None-Match": resp.headers["ETag"]})
+        assert resp.status_code == 304
+
+        resp = client.get("/api/users?fields=email")
+        assert all(set(u) == {"email"} for u in json.loads(resp.data)["items"])
+
     def test_get_missing(self, client):
         """GET for a nonexistent ID should return 404."""
         resp = client.get("/api/users/999999")
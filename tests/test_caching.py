@@ -0,0 +1,157 @@
+"""Tests for the generation-checked cache helpers."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from swimapi.caching import (
+    CacheStats, bucket_key, cached_view, invalidate, lookup, store, timeslot_key, timeslot_keys
+)
+from swimapi.extensions import cache
+from swimapi.changes import change
+
+
+def _view(app, calls, started=None, release=None):
+    """Return a cached view that counts its calls and can be held open."""
+    @cached_view("test_view", lambda: "view_key")
+    def view():
+        calls.append(1)
+        if started is not None:
+            started.set()
+            release.wait(5)
+        return {"n": len(calls)}, 200, {"ETag": '"x"'}
+
+    def call():
+        with app.test_request_context():
+            return view()
+    return call
+
+
+class TestStoreAndLookup:
+    """Tests for the generation-checked store() and lookup()."""
+
+    def test_found_until_invalidated(self, app_factory):
+        """A stored value is found until its key is invalidated."""
+        with app_factory().app_context():
+            found, generations = lookup("test", ["a", "b"])
+            assert not found
+            store({"a": 1}, generations)
+            assert lookup("test", ["a", "b"])[0] == {"a": 1}
+            invalidate(["a"])
+            assert lookup("test", ["a"])[0] == {}
+
+    def test_store_after_invalidation_is_ignored(self, app_factory):
+        """A value computed before a concurrent invalidation is never served."""
+        with app_factory().app_context():
+            _, generations = lookup("test", ["a"])
+            invalidate(["a"])
+            store({"a": "stale"}, generations)
+            assert lookup("test", ["a"])[0] == {}
+
+
+class TestCacheStats:
+    """Tests for the CacheStats counters."""
+
+    def test_counts_per_namespace(self):
+        """Hits and misses are counted per namespace."""
+        stats = CacheStats()
+        stats.record("x", hits=2, misses=1)
+        stats.record("x", hits=1)
+        assert stats.snapshot() == {"x": {"hits": 3, "misses": 1}}
+        stats.clear()
+        assert stats.snapshot() == {}
+
+
+class TestTimeslotKeys:
+    """Tests for timeslot_keys()."""
+
+    def test_item_and_bucket_keys(self):
+        """Changes map to item and day bucket keys, including a moved slot's old day."""
+        start = datetime(2026, 2, 22, 8)
+        moved = change("timeslot", "upsert", 7, (7, 1, start),
+                       moved_from=(2, datetime(2026, 2, 20, 8)))
+        created = change("timeslot", "upsert", 8, (8, 1, start), created=True)
+        reserved = change("reservation", "upsert", 3, (9, 1, start), created=True)
+        assert timeslot_keys([moved, created, reserved]) == {
+            timeslot_key(7), timeslot_key(9),
+            bucket_key(1, start.date()), bucket_key(2, datetime(2026, 2, 20).date()),
+        }
+
+
+class TestCachedView:
+    """Tests for the cached_view() decorator."""
+
+    def test_hit(self, app_factory):
+        """The second call is a hit served without calling the view."""
+        calls = []
+        call = _view(app_factory(), calls)
+        assert call()[2]["X-Cache"] == "MISS"
+        body, _, headers = call()
+        assert headers == {"ETag": '"x"', "X-Cache": "HIT"}
+        assert body == {"n": 1}
+        assert len(calls) == 1
+
+    def test_single_flight(self, app_factory):
+        """Concurrent misses compute the value once."""
+        calls, started, release = [], threading.Event(), threading.Event()
+        call = _view(app_factory(), calls, started, release)
+        with ThreadPoolExecutor(8) as pool:
+            results = [pool.submit(call) for _ in range(8)]
+            started.wait(5)
+            time.sleep(0.1)
+            release.set()
+            bodies = [r.result()[0] for r in results]
+        assert len(calls) == 1
+        assert bodies == [{"n": 1}] * 8
+
+    def test_stale_while_revalidate(self, app_factory):
+        """An expired entry is served stale while one request refreshes it."""
+        app = app_factory()
+        app.config["CACHE_DEFAULT_TIMEOUT"] = 1
+        calls, started, release = [], threading.Event(), threading.Event()
+        call = _view(app, calls, started, release)
+        release.set()
+        call()
+        time.sleep(1.1)
+
+        started.clear()
+        release.clear()
+        with ThreadPoolExecutor(1) as pool:
+            refresh = pool.submit(call)
+            started.wait(5)
+            body, _, headers = call()
+            assert headers["X-Cache"] == "STALE"
+            assert body == {"n": 1}
+            release.set()
+            assert refresh.result()[0] == {"n": 2}
+        assert call()[2]["X-Cache"] == "HIT"
+
+    def test_waits_for_other_process(self, app_factory):
+        """A miss whose key is locked elsewhere waits for that result instead of computing."""
+        app = app_factory()
+        calls = []
+        call = _view(app, calls)
+        with app.app_context():
+            _, generations = lookup("test", ["view_key"])
+            cache.add("view_key:lock", 1)
+
+        def other_process():
+            time.sleep(0.2)
+            with app.app_context():
+                store({"view_key": ({"n": "other"}, 200, {}, time.time() + 60)}, generations)
+
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(other_process)
+            assert call()[0] == {"n": "other"}
+        assert not calls
+
+    def test_lock_timeout_keeps_other_lock(self, app_factory):
+        """A request that stops waiting computes the value but leaves the other lock in place."""
+        app = app_factory(CACHE_LOCK_TIMEOUT=1)
+        calls = []
+        call = _view(app, calls)
+        with app.app_context():
+            cache.add("view_key:lock", 1)
+        assert call()[0] == {"n": 1}
+        with app.app_context():
+            assert cache.get("view_key:lock") == 1
@@ -0,0 +1,180 @@
+"""Tests for ETag, conditional GET and If-Match handling."""
+import json
+
+import pytest
+from sqlalchemy.orm.exc import StaleDataError
+
+from swimapi.models import db, Reservation, Resource, Timeslot
+
+
+class TestConditionalGet:
+    """Tests for the add_etag() after_request hook."""
+
+    def test_get_has_strong_etag(self, client):
+        """A successful GET should carry a strong ETag."""
+        resp = client.get("/api/resources")
+        etag, weak = resp.get_etag()
+        assert etag
+        assert not weak
+
+    def test_if_none_match_returns_304(self, client):
+        """Repeating a GET with the ETag should return an empty 304."""
+        etag = client.get("/api/timeslots").headers["ETag"]
+        resp = client.get("/api/timeslots", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.data == b""
+        assert resp.headers["ETag"] == etag
+
+    def test_etag_changes_with_content(self, client):
+        """A reservation should change the ETag of its timeslot."""
+        with client.application.app_context():
+            reserved = Reservation.query.with_entities(Reservation.slot_id)
+            slot_id = Timeslot.query.filter(~Timeslot.slot_id.in_(reserved)).first().slot_id
+
+        url = f"/api/timeslots/{slot_id}"
+        etag = client.get(url).headers["ETag"]
+        client.post(
+            "/api/reservations",
+            json={"slot_id": slot_id},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        resp = client.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert json.loads(resp.data)["reservation"]["slot_id"] == slot_id
+
+    def test_non_get_has_no_etag(self, client):
+        """Write responses should not be given an ETag."""
+        resp = client.post(
+            "/api/resources",
+            json={"name": "Etag Pool", "resource_type": "pool"},
+            headers={"swimapi-api-key": "admin-api-key"}
+        )
+        assert resp.status_code == 201
+        assert "ETag" not in resp.headers
+
+    def test_error_has_no_etag(self, client):
+        """Error responses should not be given an ETag."""
+        resp = client.get("/api/timeslots/999999")
+        assert resp.status_code == 404
+        assert "ETag" not in resp.headers
+
+
+class TestRowVersioning:
+    """Tests for version ETags, Last-Modified and If-Match preconditions."""
+
+    @staticmethod
+    def _resource_body(name="Versioned Pool"):
+        return {"name": name, "description": "v", "resource_type": "pool"}
+
+    def test_version_increments_on_update(self, client):
+        """Each PUT should bump the version exposed by serialize()."""
+        headers = {"swimapi-api-key": "admin-api-key"}
+        before = json.loads(client.get("/api/resources/1").data)
+        assert before["version"] == 1
+        assert before["updated_at"]
+
+        client.put("/api/resources/1", json=self._resource_body(), headers=headers)
+        after = json.loads(client.get("/api/resources/1").data)
+        assert after["version"] == 2
+
+    def test_item_etag_and_last_modified(self, client):
+        """Item GETs should carry a version ETag and Last-Modified."""
+        resp = client.get("/api/users/1")
+        assert resp.headers["ETag"] == '"user-1-v1"'
+        assert "Last-Modified" in resp.headers
+
+    def test_not_modified_skips_serialization(self, client, monkeypatch):
+        """A current If-None-Match should be answered without serializing the row."""
+        etag = client.get("/api/timeslots/1").headers["ETag"]
+
+        def _fail(_self):
+            raise AssertionError("serialize() should not be called")
+
+        monkeypatch.setattr(Timeslot, "serialize", _fail)
+        resp = client.get("/api/timeslots/1", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+
+    def test_timeslot_etag_tracks_reservation(self, client):
+        """Reserving a slot should change its ETag although the slot row is unchanged."""
+        with client.application.app_context():
+            reserved = Reservation.query.with_entities(Reservation.slot_id)
+            slot_id = Timeslot.query.filter(~Timeslot.slot_id.in_(reserved)).first().slot_id
+        url = f"/api/timeslots/{slot_id}"
+        etag = client.get(url).headers["ETag"]
+        client.post(
+            "/api/reservations",
+            json={"slot_id": slot_id},
+            headers={"swimapi-api-key": "customer-api-key1"}
+        )
+        assert client.get(url).headers["ETag"] != etag
+
+    def test_if_match_current(self, client):
+        """PUT with the current ETag in If-Match should succeed."""
+        etag = client.get("/api/resources/1").headers["ETag"]
+        resp = client.put(
+            "/api/resources/1",
+            json=self._resource_body(),
+            headers={"swimapi-api-key": "admin-api-key", "If-Match": etag}
+        )
+        assert resp.status_code == 204
+
+    def test_if_match_stale(self, client):
+        """PUT with an outdated ETag in If-Match should return 412."""
+        headers = {"swimapi-api-key": "admin-api-key"}
+        etag = client.get("/api/resources/1").headers["ETag"]
+        client.put("/api/resources/1", json=self._resource_body("First"), headers=headers)
+
+        resp = client.put(
+            "/api/resources/1",
+            json=self._resource_body("Second"),
+            headers={**headers, "If-Match": etag}
+        )
+        assert resp.status_code == 412
+
+    def test_if_match_stale_timeslot_and_user(self, client):
+        """Timeslot and user PUTs should also honour If-Match."""
+        resp = client.put(
+            "/api/timeslots/1",
+            json={
+                "resource_id": 1,
+                "start_time": "2030-01-01T08:00:00",
+                "end_time": "2030-01-01T09:00:00",
+            },
+            headers={"swimapi-api-key": "admin-api-key", "If-Match": '"timeslot-1-v0-r0"'}
+        )
+        assert resp.status_code == 412
+
+        resp = client.put(
+            "/api/users/2",
+            json={"name": "Alice", "email": "alice@example.com"},
+            headers={"swimapi-api-key": "customer-api-key1", "If-Match": '"user-2-v0"'}
+        )
+        assert resp.status_code == 412
+
+    def test_concurrent_update_detected(self, client, monkeypatch):
+        """A version mismatch at commit time should return 412 instead of overwriting."""
+        def _stale_commit():
+            raise StaleDataError("version mismatch")
+
+        monkeypatch.setattr(db.session, "commit", _stale_commit)
+        for url, body, key in (
+            ("/api/resources/1", self._resource_body(), "admin-api-key"),
+            ("/api/users/2", {"name": "A", "email": "a@example.com"}, "customer-api-key1"),
+            ("/api/timeslots/1", {
+                "resource_id": 1,
+                "start_time": "2030-01-01T08:00:00",
+                "end_time": "2030-01-01T09:00:00",
+            }, "admin-api-key"),
+        ):
+            resp = client.put(url, json=body, headers={"swimapi-api-key": key})
+            assert resp.status_code == 412
+
+    def test_version_column_guards_update(self, client):
+        """Updating a row whose version changed underneath should raise StaleDataError."""
+        resource = db.session.get(Resource, 1)
+        db.session.execute(db.text("UPDATE resource SET version = version + 1"))
+        resource.name = "Lost Update"
+        with pytest.raises(StaleDataError):
+            db.session.commit()
+        db.session.rollback()
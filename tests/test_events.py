@@ -0,0 +1,44 @@
+"""Tests for the in-process event broker."""
+from swimapi.events import LocalBroker
+
+
+class TestLocalBroker:
+    """Tests for the LocalBroker channel subscriptions."""
+
+    def test_publish_to_channel_subscribers(self):
+        """Only subscribers of the channel receive an event."""
+        broker = LocalBroker()
+        first, second = broker.subscribe(1), broker.subscribe(1)
+        other = broker.subscribe(2)
+        broker.publish(1, {"type": "x"})
+        assert first.get(timeout=0) == {"type": "x"}
+        assert second.get(timeout=0) == {"type": "x"}
+        assert other.get(timeout=0) is None
+
+    def test_unsubscribe(self):
+        """An unsubscribed subscription gets no more events."""
+        broker = LocalBroker()
+        subscription = broker.subscribe(1)
+        broker.unsubscribe(1, subscription)
+        broker.publish(1, {"type": "x"})
+        assert subscription.get(timeout=0) is None
+        assert broker.subscriber_count(1) == 0
+
+    def test_slow_subscriber_overflows(self):
+        """A full queue marks the subscriber overflowed instead of blocking."""
+        broker = LocalBroker(queue_size=1)
+        subscription = broker.subscribe(1)
+        broker.publish(1, {"n": 1})
+        broker.publish(1, {"n": 2})
+        assert subscription.overflowed
+        assert subscription.get(timeout=0) == {"n": 1}
+
+
+class TestInitEvents:
+    """Tests for the broker configuration of the app."""
+
+    def test_custom_broker(self, app_factory):
+        """EVENT_BROKER replaces the default LocalBroker."""
+        broker = LocalBroker()
+        app = app_factory(EVENT_BROKER=broker)
+        assert app.extensions["swimapi_broker"] is broker
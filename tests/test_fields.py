@@ -0,0 +1,52 @@
+"""Unit tests for the sparse fieldset helpers."""
+import pytest
+from sqlalchemy import select
+from werkzeug.exceptions import BadRequest
+
+from swimapi.fields import fields_arg, fields_tag, load_fields, trim, wants_field
+from swimapi.models import db, Timeslot
+
+
+class TestFieldsArg:
+    """Tests for fields_arg()."""
+
+    def test_absent(self, client):
+        """Without ?fields= the full representation is requested."""
+        with client.application.test_request_context("/"):
+            assert fields_arg(Timeslot) is None
+
+    def test_parsed(self, client):
+        """A comma-separated list should be parsed into a set of fields."""
+        with client.application.test_request_context("/?fields=slot_id, start_time,"):
+            assert fields_arg(Timeslot) == {"slot_id", "start_time"}
+
+    def test_invalid(self, client):
+        """Unknown or no fields should raise BadRequest."""
+        for query in ("fields=slot_id,secret", "fields=", "fields=,"):
+            with client.application.test_request_context(f"/?{query}"):
+                with pytest.raises(BadRequest):
+                    fields_arg(Timeslot)
+
+
+def test_trim_and_tag():
+    """trim() and fields_tag() leave the full representation alone."""
+    item = {"slot_id": 1, "start_time": "2026-02-22T08:00:00", "version": 1}
+    assert trim(item, None) is item
+    assert trim(item, {"slot_id"}) == {"slot_id": 1}
+    assert fields_tag(None) == ()
+    assert fields_tag({"version", "slot_id"}) == ("fields=slot_id,version",)
+    assert wants_field(None, "reservation")
+    assert not wants_field({"slot_id"}, "reservation")
+
+
+def test_load_fields(client):
+    """Only the primary key, the requested columns and required ones are selected."""
+    with client.application.app_context():
+        stmt = select(Timeslot).options(*load_fields(Timeslot, {"start_time", "reservation"}))
+        columns = str(stmt.compile(db.engine)).split("FROM")[0]
+        assert "slot_id" in columns and "start_time" in columns
+        assert "end_time" not in columns and "version" not in columns
+
+        stmt = select(Timeslot).options(*load_fields(Timeslot, {"start_time"}, "version"))
+        assert "version" in str(stmt.compile(db.engine)).split("FROM")[0]
+        assert not load_fields(Timeslot, None)
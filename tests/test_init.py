@@ -1,11 +1,14 @@
 """Tests for swimapi/__init__.py (application factory)."""
 
+import sqlite3
+
 import pytest
 from flask import Flask
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import IntegrityError, OperationalError
 
-from swimapi import create_app
+from swimapi import SQLITE_PROFILES, create_app, set_sqlite_pragma, sqlite_pragmas
+from swimapi.extensions import cache
 from swimapi.models import db, User, Reservation
 
 
@@ -46,6 +49,105 @@ class TestCreateApp:
         application = create_app()
         assert application.debug is False
 
+    def test_config_mapping(self):
+        """Settings passed to create_app() should select the database."""
+        application = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        with application.app_context():
+            assert db.engine.url.database == ":memory:"
+
+    def test_database_url_from_environment(self, monkeypatch, tmp_path):
+        """SWIMAPI_DATABASE_URL should override the default database."""
+        monkeypatch.setenv("SWIMAPI_DATABASE_URL", f"sqlite:///{tmp_path / 'env.db'}")
+        application = create_app()
+        with application.app_context():
+            assert db.engine.url.database == str(tmp_path / "env.db")
+
+    def test_config_mapping_overrides_environment_url(self, monkeypatch, tmp_path):
+        """An explicit SQLALCHEMY_DATABASE_URI should win over SWIMAPI_DATABASE_URL."""
+        monkeypatch.setenv("SWIMAPI_DATABASE_URL", f"sqlite:///{tmp_path / 'prod.db'}")
+        application = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        with application.app_context():
+            assert db.engine.url.database == ":memory:"
+        assert not (tmp_path / "prod.db").exists()
+
+        application = create_app({"DATABASE_URL": f"sqlite:///{tmp_path / 'mapped.db'}"})
+        with application.app_context():
+            assert db.engine.url.database == str(tmp_path / "mapped.db")
+
+    def test_default_api_key_secret_warning(self, caplog):
+        """The development API_KEY_SECRET should be warned about outside TESTING."""
+        uri = "sqlite:///:memory:"
+        create_app({"SQLALCHEMY_DATABASE_URI": uri})
+        assert "API_KEY_SECRET" in caplog.text
+
+        caplog.clear()
+        create_app({"SQLALCHEMY_DATABASE_URI": uri, "TESTING": True})
+        create_app({"SQLALCHEMY_DATABASE_URI": uri, "API_KEY_SECRET": "production-secret"})
+        assert "API_KEY_SECRET" not in caplog.text
+
+    def test_pool_settings(self, monkeypatch, tmp_path):
+        """DB_POOL_* settings from config and environment should reach the engine pool."""
+        monkeypatch.setenv("SWIMAPI_DB_POOL_SIZE", "3")
+        application = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'pool.db'}",
+            "DB_MAX_OVERFLOW": 2,
+            "DB_POOL_RECYCLE": 300,
+            "DB_POOL_PRE_PING": True,
+        })
+        with application.app_context():
+            pool = db.engine.pool
+            assert pool.size() == 3
+            assert pool._max_overflow == 2  # pylint: disable=protected-access
+            assert pool._recycle == 300  # pylint: disable=protected-access
+            assert pool._pre_ping is True  # pylint: disable=protected-access
+
+    def test_pool_settings_in_memory(self, monkeypatch):
+        """QueuePool settings should be skipped for an in-memory SQLite database."""
+        monkeypatch.setenv("SWIMAPI_DB_POOL_SIZE", "5")
+        application = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "DB_POOL_TIMEOUT": 10,
+            "DB_POOL_PRE_PING": True,
+        })
+        options = application.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        assert "pool_size" not in options
+        assert "pool_timeout" not in options
+        assert options["pool_pre_ping"] is True
+        with application.app_context():
+            assert db.session.execute(text("SELECT 1")).scalar() == 1
+
+    def test_cache_defaults(self):
+        """The response cache defaults to a 60 s per-process SimpleCache."""
+        application = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        assert application.config["CACHE_TYPE"] == "SimpleCache"
+        assert application.config["CACHE_DEFAULT_TIMEOUT"] == 60
+
+    def test_cache_from_environment(self, monkeypatch, tmp_path):
+        """SWIMAPI_CACHE_* settings should select the cache backend."""
+        monkeypatch.setenv("SWIMAPI_CACHE_TYPE", "FileSystemCache")
+        monkeypatch.setenv("SWIMAPI_CACHE_DIR", str(tmp_path))
+        application = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        with application.app_context():
+            assert type(cache.cache).__name__ == "FileSystemCache"
+
+    def test_shared_cache_invalidated_across_workers(self, file_client, tmp_path):
+        """A write through one worker invalidates the shared cache for the others."""
+        config = {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+            "CACHE_TYPE": "FileSystemCache",
+            "CACHE_DIR": str(tmp_path / "cache"),
+        }
+        first = create_app(config).test_client()
+        second = create_app(config).test_client()
+        admin = {"swimapi-api-key": "admin-api-key"}
+
+        assert len(first.get("/api/resources").get_json()["items"]) == 5
+        resp = second.post("/api/resources", headers=admin,
+                           json={"name": "Cold Pool", "resource_type": "pool"})
+        assert resp.status_code == 201
+        assert len(first.get("/api/resources").get_json()["items"]) == 6
+
 
 class TestDatabaseInit:
     """Tests for database table creation and basic ORM operations."""
@@ -101,7 +203,7 @@ class TestDatabaseInit:
             db.session.rollback()
 
 
-class TestSQLitePragma:  # pylint: disable=too-few-public-methods
+class TestSQLitePragma:
     """Tests that SQLite PRAGMA settings are applied correctly."""
 
     def test_foreign_keys_pragma_on(self, bare_client):
@@ -111,6 +213,31 @@ class TestSQLitePragma:  # pylint: disable=too-few-public-methods
             result = db.session.execute(db.text("PRAGMA foreign_keys")).scalar()
         assert result == 1
 
+    def test_default_profile(self):
+        """create_app() should select the default profile unless configured otherwise."""
+        application = create_app()
+        assert sqlite_pragmas(application.config) == SQLITE_PROFILES["default"]
+
+    def test_profile_overrides(self):
+        """SQLITE_PRAGMAS should override individual values of the selected profile."""
+        pragmas = sqlite_pragmas({
+            "SQLITE_PROFILE": "performance",
+            "SQLITE_PRAGMAS": {"busy_timeout": 100},
+        })
+        assert pragmas["journal_mode"] == "WAL"
+        assert pragmas["busy_timeout"] == 100
+
+    def test_performance_profile_applied(self, tmp_path):
+        """The performance profile should switch a file database to WAL and NORMAL sync."""
+        conn = sqlite3.connect(tmp_path / "perf.db")
+        set_sqlite_pragma(conn, None, pragmas=SQLITE_PROFILES["performance"])
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        conn.close()
+
 
 class TestRoutesRegistered:
     """Tests that the expected URL routes are registered in the app."""
@@ -0,0 +1,138 @@
+"""Tests for the Prometheus metrics registry and /metrics endpoint."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from swimapi.caching import cache_stats
+from swimapi.metrics import (
+    AGGREGATE, MetricsRegistry, merge, prune_snapshots, read_snapshots, registry, render,
+    snapshot_name, write_snapshot,
+)
+
+WORKER = """
+from swimapi import create_app
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "METRICS_DIR": %r})
+client = app.test_client()
+for _ in range(3):
+    client.get("/api/users")
+"""
+
+
+@pytest.fixture(autouse=True)
+def _clear_metrics():
+    registry.clear()
+    cache_stats.clear()
+
+
+def _samples(text):
+    """Return {sample name with labels: value} for the sample lines of an exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestRender:
+    """Tests for merging and rendering snapshots."""
+
+    def test_histogram_rendering(self):
+        """Histogram buckets are cumulative and end with +Inf, _sum and _count."""
+        metrics = MetricsRegistry()
+        labels = (("resource", "useritem"), ("method", "GET"))
+        for value in (0.001, 0.02, 30):
+            metrics.observe("swimapi_request_duration_seconds", labels, value)
+        metrics.inc("swimapi_reservation_conflicts_total")
+        samples = _samples(render(*merge([metrics.snapshot()])))
+        bucket = 'swimapi_request_duration_seconds_bucket{resource="useritem",method="GET",le="%s"}'
+        assert samples[bucket % 0.005] == 1
+        assert samples[bucket % 0.025] == 2
+        assert samples[bucket % 10.0] == 2
+        assert samples[bucket % "+Inf"] == 3
+        count = 'swimapi_request_duration_seconds_count{resource="useritem",method="GET"}'
+        assert samples[count] == 3
+        assert samples["swimapi_reservation_conflicts_total"] == 1
+
+    def test_merge_sums_processes(self):
+        """Snapshots of several processes are added up, label set by label set."""
+        first, second = MetricsRegistry(), MetricsRegistry()
+        first.inc("swimapi_db_pool_checkouts_total", amount=2)
+        second.inc("swimapi_db_pool_checkouts_total", amount=3)
+        second.observe("swimapi_request_duration_seconds", (("method", "GET"),), 0.5)
+        snapshots = json.loads(json.dumps([first.snapshot(), second.snapshot()]))
+        counters, histograms = merge(snapshots)
+        assert counters["swimapi_db_pool_checkouts_total", ()] == 5
+        assert histograms["swimapi_request_duration_seconds", (("method", "GET"),)][1] == 0.5
+
+
+class TestMetricsEndpoint:
+    """Tests for the /metrics endpoint."""
+
+    def test_counts(self, client):
+        """/metrics counts requests by resource, method and status, cache lookups and conflicts."""
+        client.get("/api/resources")
+        client.get("/api/resources")
+        client.get("/api/users/999999")
+        headers = {"swimapi-api-key": "customer-api-key1"}
+        reserved = client.get("/api/timeslots?available=false").get_json()["items"][0]
+        assert client.post("/api/reservations", json={"slot_id": reserved["slot_id"]},
+                           headers=headers).status_code == 409
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type == "text/plain; version=0.0.4; charset=utf-8"
+        samples = _samples(response.get_data(as_text=True))
+        requests = 'swimapi_requests_total{resource="%s",method="%s",status="%s"}'
+        assert samples[requests % ("resourcecollection", "GET", 200)] == 2
+        assert samples[requests % ("useritem", "GET", 404)] == 1
+        assert samples[requests % ("reservationcollection", "POST", 409)] == 1
+        cache = 'swimapi_cache_requests_total{namespace="resource_collection",result="%s"}'
+        assert samples[cache % "hit"] == 1
+        assert samples["swimapi_reservation_conflicts_total"] == 1
+        assert samples["swimapi_db_pool_checkouts_total"] > 0
+
+
+class TestMetricsDir:
+    """Tests for the snapshots shared through METRICS_DIR."""
+
+    def test_totals_across_processes(self, app_factory, tmp_path):
+        """With METRICS_DIR, /metrics sums the requests handled by every worker process."""
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", WORKER % str(tmp_path)], check=True)
+        assert len(read_snapshots(tmp_path)) == 2
+
+        app = app_factory(METRICS_DIR=str(tmp_path))
+        client = app.test_client()
+        client.get("/api/users")
+        samples = _samples(client.get("/metrics").get_data(as_text=True))
+        requests = 'swimapi_requests_total{resource="usercollection",method="GET",status="200"}'
+        assert samples[requests] == 7
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == sorted(
+            [AGGREGATE, snapshot_name()]
+        )
+        samples = _samples(client.get("/metrics").get_data(as_text=True))
+        assert samples[requests] == 7
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="exited workers are only pruned with flock")
+    def test_prune_keeps_live_processes(self, tmp_path):
+        """Files of live processes, including one that reuses an exited worker's pid, are kept."""
+        registry.inc("swimapi_db_pool_checkouts_total", amount=2)
+        write_snapshot(tmp_path)
+        snapshot = json.loads((tmp_path / snapshot_name()).read_text())
+        exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                                check=True, capture_output=True, text=True)
+        (tmp_path / "exited.json").write_text(
+            json.dumps({**snapshot, "pid": int(exited.stdout)})
+        )
+        (tmp_path / "reused.json").write_text(json.dumps({**snapshot, "pid": os.getppid()}))
+
+        prune_snapshots(tmp_path)
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == sorted(
+            [AGGREGATE, "reused.json", snapshot_name()]
+        )
+        counters, _ = merge(read_snapshots(tmp_path))
+        assert counters["swimapi_db_pool_checkouts_total", ()] == 6
@@ -0,0 +1,93 @@
+"""Tests for the in-place database upgrades in swimapi.migrations."""
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, text
+from swimapi.migrations import add_version_columns, hash_plaintext_api_keys
+from swimapi.models import hash_api_key, Timeslot
+
+
+def _old_schema_engine():
+    """Return an in-memory engine holding a user table from before key hashing."""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE "user" (user_id INTEGER PRIMARY KEY, name VARCHAR(100), '
+            "email VARCHAR(255) UNIQUE, api_key VARCHAR(64) UNIQUE)"
+        ))
+        conn.execute(text(
+            'INSERT INTO "user" (name, email, api_key) VALUES '
+            "('A', 'a@example.com', 'plain-key-a'), ('B', 'b@example.com', NULL)"
+        ))
+    return engine
+
+
+class TestHashPlaintextApiKeys:
+    """Tests for hash_plaintext_api_keys()."""
+
+    def test_hashes_existing_keys(self, client):
+        """Plaintext keys should be replaced by their hash and prefix."""
+        engine = _old_schema_engine()
+        with engine.begin() as conn:
+            assert hash_plaintext_api_keys(conn) == 1
+            row = conn.execute(text(
+                'SELECT api_key, api_key_prefix FROM "user" WHERE email = \'a@example.com\''
+            )).one()
+        assert row.api_key == hash_api_key("plain-key-a")
+        assert row.api_key_prefix == "plain-ke"
+
+    def test_idempotent(self, client):
+        """Running the upgrade twice should not hash keys twice."""
+        engine = _old_schema_engine()
+        with engine.begin() as conn:
+            hash_plaintext_api_keys(conn)
+        with engine.begin() as conn:
+            assert hash_plaintext_api_keys(conn) == 0
+
+    def test_cli_command(self, client):
+        """The upgrade-db command should run against the app database."""
+        result = client.application.test_cli_runner().invoke(args=["upgrade-db"])
+        assert result.exit_code == 0
+        assert "api_keys_hashed: 0" in result.output
+        assert "tables_versioned: 0" in result.output
+
+
+class TestAddVersionColumns:
+    """Tests for add_version_columns()."""
+
+    def test_adds_columns(self, client):
+        """Old tables should gain version 1 and an updated_at copied from created_at."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            for table in ("resource", "timeslot", "reservation"):
+                conn.execute(text(f'CREATE TABLE "{table}" (id INTEGER PRIMARY KEY)'))
+            conn.execute(text(
+                'CREATE TABLE "user" (user_id INTEGER PRIMARY KEY, created_at DATETIME)'
+            ))
+            conn.execute(text(
+                'INSERT INTO "user" (created_at) VALUES (\'2026-01-01 10:00:00\')'
+            ))
+            assert add_version_columns(conn) == 4
+            row = conn.execute(text('SELECT version, updated_at FROM "user"')).one()
+            assert add_version_columns(conn) == 0
+        assert row.version == 1
+        assert row.updated_at == "2026-01-01 10:00:00"
+
+    def test_rows_inserted_after_upgrade_get_updated_at(self, client):
+        """Rows inserted into an upgraded table should get updated_at from the model default."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            for table in ("user", "resource", "reservation"):
+                conn.execute(text(f'CREATE TABLE "{table}" (id INTEGER PRIMARY KEY)'))
+            conn.execute(text(
+                "CREATE TABLE timeslot (slot_id INTEGER PRIMARY KEY, resource_id INTEGER, "
+                "start_time DATETIME, end_time DATETIME)"
+            ))
+            add_version_columns(conn)
+            conn.execute(insert(Timeslot.__table__), {
+                "resource_id": 1,
+                "start_time": datetime(2026, 3, 1, 8),
+                "end_time": datetime(2026, 3, 1, 9),
+            })
+            row = conn.execute(text("SELECT version, updated_at FROM timeslot")).one()
+        assert row.version == 1
+        assert row.updated_at is not None
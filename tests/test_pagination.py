@@ -0,0 +1,65 @@
+"""Unit tests for swimapi keyset pagination helpers."""
+import pytest
+from werkzeug.exceptions import BadRequest
+from swimapi.models import User
+from swimapi.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, page_limit, paginate
+)
+
+
+class TestCursor:
+    """Tests for encode_cursor() and decode_cursor()."""
+
+    def test_round_trip(self):
+        """A cursor should decode back to the key it was built from."""
+        assert decode_cursor(encode_cursor(12345)) == 12345
+
+    def test_is_opaque(self):
+        """The cursor should not expose the raw key value."""
+        assert encode_cursor(42) != "42"
+
+    def test_invalid_cursor(self):
+        """Decoding garbage should raise BadRequest."""
+        with pytest.raises(BadRequest):
+            decode_cursor("not-a-cursor!")
+
+
+class TestPageLimit:
+    """Tests for the page_limit() helper."""
+
+    def test_bounded(self, client):
+        """A limit above MAX_PAGE_SIZE should be clamped."""
+        with client.application.test_request_context("/?limit=999999"):
+            assert page_limit() == MAX_PAGE_SIZE
+
+    def test_non_positive(self, client):
+        """A zero or negative limit should raise BadRequest."""
+        with client.application.test_request_context("/?limit=0"):
+            with pytest.raises(BadRequest):
+                page_limit()
+
+    def test_not_an_integer(self, client):
+        """A non-integer limit should raise BadRequest instead of using the default."""
+        with client.application.test_request_context("/?limit=abc"):
+            with pytest.raises(BadRequest):
+                page_limit()
+        with client.application.test_request_context("/"):
+            assert page_limit() == DEFAULT_PAGE_SIZE
+
+
+class TestPaginate:
+    """Tests for the paginate() helper."""
+
+    def test_first_page(self, client):
+        """The first page should hold limit rows and a next cursor."""
+        with client.application.test_request_context("/?limit=2"):
+            rows, cursor = paginate(User.query, User.user_id)
+        assert [u.user_id for u in rows] == [1, 2]
+        assert decode_cursor(cursor) == 2
+
+    def test_last_page(self, client):
+        """The last page should have no next cursor."""
+        with client.application.test_request_context(f"/?limit=2&after={encode_cursor(3)}"):
+            rows, cursor = paginate(User.query, User.user_id)
+        assert [u.user_id for u in rows] == [4, 5]
+        assert cursor is None
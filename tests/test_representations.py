@@ -0,0 +1,66 @@
+"""Tests for the JSON output representation."""
+import json
+from datetime import datetime
+
+import pytest
+
+from swimapi.representations import dumps, orjson
+
+BODY = {"items": [{"slot_id": 1, "start_time": datetime(2026, 2, 22, 8), "name": "Äimä"}],
+        "next": None}
+EXPECTED = {"items": [{"slot_id": 1, "start_time": "2026-02-22T08:00:00", "name": "Äimä"}],
+            "next": None}
+
+
+class TestDumps:
+    """Tests for dumps() with both JSON backends."""
+
+    @pytest.mark.parametrize("backend", ["json", "orjson"])
+    def test_encoding(self, app_factory, backend):
+        """Both backends encode datetimes as ISO strings and end the body in a newline."""
+        with app_factory(JSON_BACKEND=backend).app_context():
+            encoded = dumps(BODY)
+        assert encoded.endswith(b"\n")
+        assert json.loads(encoded) == EXPECTED
+
+    @pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+    def test_backends_agree(self, app_factory):
+        """The orjson and stdlib encodings decode to the same document."""
+        with app_factory(JSON_BACKEND="orjson").app_context():
+            fast = dumps(BODY)
+        with app_factory(JSON_BACKEND="json").app_context():
+            stdlib = dumps(BODY)
+        assert json.loads(fast) == json.loads(stdlib)
+
+    @pytest.mark.parametrize("backend", ["json", "orjson"])
+    def test_debug_indent(self, app_factory, backend):
+        """Debug mode pretty-prints the body."""
+        app = app_factory(JSON_BACKEND=backend)
+        app.debug = True
+        with app.app_context():
+            assert b"\n " in dumps(BODY)
+
+    @pytest.mark.parametrize("backend", ["json", "orjson"])
+    def test_compact(self, app_factory, backend):
+        """pretty=False keeps the body on one line even in debug mode."""
+        app = app_factory(JSON_BACKEND=backend)
+        app.debug = True
+        with app.app_context():
+            assert dumps(BODY, pretty=False).count(b"\n") == 1
+
+    def test_unserializable_value(self, app_factory):
+        """Values neither backend knows are rejected."""
+        with app_factory(JSON_BACKEND="json").app_context(), pytest.raises(TypeError):
+            dumps({"value": object()})
+
+
+class TestOutputJson:
+    """Tests for the representation registered with the API."""
+
+    def test_api_responses(self, client):
+        """API responses go through the representation."""
+        response = client.get("/api/resources")
+        assert response.status_code == 200
+        assert response.mimetype == "application/json"
+        assert response.data.endswith(b"\n")
+        assert "items" in response.get_json()
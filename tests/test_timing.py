@@ -0,0 +1,71 @@
+"""Tests for the opt-in Server-Timing instrumentation."""
+import json
+import logging
+
+from sqlalchemy import event
+
+from swimapi.models import db
+from swimapi.timing import _before_cursor_execute, RequestTiming, timed
+
+
+def _metrics(header):
+    """Return {name: {param: value}} parsed from a Server-Timing header."""
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class TestServerTiming:
+    """Tests for the Server-Timing header and log line of requests."""
+
+    def test_disabled_by_default(self, app_factory):
+        """Without SERVER_TIMING no header is sent and no engine hook is registered."""
+        app = app_factory()
+        response = app.test_client().get("/api/timeslots")
+        assert "Server-Timing" not in response.headers
+        with app.app_context():
+            assert not event.contains(db.engine, "before_cursor_execute", _before_cursor_execute)
+            with timed("validation"):
+                pass
+
+    def test_server_timing_header(self, app_factory):
+        """The header reports SQL statements and time, validation, serialization and total."""
+        client = app_factory(SERVER_TIMING=True).test_client()
+        response = client.post("/api/users", json={"name": "Timed", "email": "timed@example.com"})
+        metrics = _metrics(response.headers["Server-Timing"])
+        assert set(metrics) == {"db", "validation", "serialization", "total"}
+        assert metrics["db"]["desc"] == '"2 statement(s)"'
+        assert float(metrics["total"]["dur"]) >= float(metrics["db"]["dur"])
+
+        response = client.get("/api/users")
+        metrics = _metrics(response.headers["Server-Timing"])
+        assert "validation" not in metrics
+        assert metrics["db"]["desc"] == '"1 statement(s)"'
+
+    def test_log_line(self, app_factory, caplog):
+        """Each request is logged as one JSON object."""
+        client = app_factory(SERVER_TIMING=True).test_client()
+        with caplog.at_level(logging.INFO, logger="swimapi.timing"):
+            client.get("/api/resources/1")
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["path"] == "/api/resources/1"
+        assert record["endpoint"] == "resourceitem"
+        assert record["status"] == 404
+        assert record["sql_statements"] == 1
+        assert record["total_ms"] >= record["db_ms"]
+
+
+class TestRequestTiming:
+    """Tests for the RequestTiming accumulator."""
+
+    def test_header(self):
+        """Durations are summed per section and written in milliseconds."""
+        timing = RequestTiming()
+        timing.add("validation", 0.001)
+        timing.add("validation", 0.0005)
+        timing.statements = 3
+        assert timing.header(0.01) == (
+            'db;desc="3 statement(s)";dur=0.00, validation;dur=1.50, total;dur=10.00'
+        )
@@ -1,8 +1,13 @@
 """Unit tests for swimapi utility functions: require_auth, get_current_user, require_admin."""
 import pytest
+from flask import g
+from sqlalchemy import event
 from werkzeug.exceptions import Forbidden
-from swimapi.utils import get_current_user, require_admin, require_auth
-from swimapi.models import db, User
+from swimapi.utils import (
+    ApiKeyCache, AuthenticatedUser, auth_cache, authenticate,
+    find_user_by_api_key, get_current_user, require_admin, require_auth
+)
+from swimapi.models import db, hash_api_key, User
 
 
 class TestRequireAuth:
@@ -55,6 +60,29 @@ class TestRequireAuth:
             require_auth(user)
 
 
+class TestFindUserByApiKey:
+    """Tests for the find_user_by_api_key() helper."""
+
+    def test_keys_sharing_prefix(self, client):
+        """Users whose keys share the lookup prefix should be told apart by hash."""
+        for i in range(1, 5):
+            user = find_user_by_api_key(f"customer-api-key{i}")
+            assert user.email == db.session.get(User, i + 1).email
+
+    def test_unknown_key(self, client):
+        """An unknown key with a known prefix should not match."""
+        assert find_user_by_api_key("customer-api-key9") is None
+
+    def test_key_not_stored_in_plaintext(self, client):
+        """The database should only hold the hash and prefix of a key."""
+        row = db.session.execute(
+            db.text('SELECT api_key, api_key_prefix FROM "user" WHERE user_type = \'admin\'')
+        ).one()
+        assert row.api_key == hash_api_key("admin-api-key")
+        assert row.api_key != "admin-api-key"
+        assert row.api_key_prefix == "admin-ap"
+
+
 class TestGetCurrentUser:
     """Tests for the get_current_user() helper."""
 
@@ -96,7 +124,7 @@ class TestGetCurrentUser:
         assert isinstance(current, User)
         assert current.user_id == user.user_id
         assert current.email == "test@test.com"
-        assert current.api_key == "correct-key"
+        assert current.api_key_hash == hash_api_key("correct-key")
 
 
 class TestRequireAdmin:
@@ -140,3 +168,124 @@ class TestRequireAdmin:
             require_admin()
 
         assert True
+
+
+class TestApiKeyCache:
+    """Tests for the ApiKeyCache LRU+TTL cache."""
+
+    def test_get_set(self):
+        """A cached entry should be returned until invalidated."""
+        cache = ApiKeyCache()
+        cache.set("key", AuthenticatedUser(1, "customer"))
+        assert cache.get("key") == (1, "customer")
+        cache.invalidate("key")
+        assert cache.get("key") is None
+
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted when full."""
+        cache = ApiKeyCache(maxsize=2)
+        cache.set("a", AuthenticatedUser(1, "customer"))
+        cache.set("b", AuthenticatedUser(2, "customer"))
+        cache.get("a")
+        cache.set("c", AuthenticatedUser(3, "customer"))
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Entries should expire after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("swimapi.utils.time.monotonic", lambda: now[0])
+        cache = ApiKeyCache(ttl=60)
+        cache.set("key", AuthenticatedUser(1, "customer"))
+        now[0] += 59
+        assert cache.get("key") is not None
+        now[0] += 2
+        assert cache.get("key") is None
+
+    def test_disabled(self):
+        """A zero TTL should disable caching."""
+        cache = ApiKeyCache(ttl=0)
+        cache.set("key", AuthenticatedUser(1, "customer"))
+        assert cache.get("key") is None
+
+
+class TestAuthenticate:
+    """Tests for the authenticate() helper."""
+
+    def test_cached_across_requests(self, client):
+        """A second request with the same key should not query the database."""
+        statements = []
+
+        def _before_execute(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        headers = {"swimapi-api-key": "admin-api-key"}
+        with client.application.test_request_context("/", headers=headers):
+            assert authenticate().user_type == "admin"
+
+        event.listen(db.engine, "before_cursor_execute", _before_execute)
+        try:
+            with client.application.test_request_context("/", headers=headers):
+                assert authenticate().user_type == "admin"
+                require_admin()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _before_execute)
+        assert not statements
+
+    def test_memoized_on_g(self, client):
+        """The principal should be stored on flask.g for the request."""
+        with client.application.test_request_context(
+            "/", headers={"swimapi-api-key": "customer-api-key1"}
+        ):
+            principal = authenticate()
+            assert g.principal is principal
+
+    def test_put_invalidates(self, client):
+        """Changing a user's type through PUT should take effect immediately."""
+        headers = {"swimapi-api-key": "customer-api-key1"}
+        with client.application.test_request_context("/", headers=headers):
+            principal = authenticate()
+        key_hash = hash_api_key("customer-api-key1")
+        assert auth_cache.get(key_hash) == principal
+
+        resp = client.put(
+            f"/api/users/{principal.user_id}",
+            json={"name": "Alice", "email": "alice@example.com", "user_type": "admin"},
+            headers=headers,
+        )
+        assert resp.status_code == 204
+        assert auth_cache.get(key_hash) is None
+
+        resp = client.get("/api/reservations", headers=headers)
+        assert resp.status_code == 200
+
+    def test_delete_invalidates(self, client):
+        """Deleting a user should revoke their cached API key."""
+        headers = {"swimapi-api-key": "customer-api-key2"}
+        with client.application.test_request_context("/", headers=headers):
+            user_id = authenticate().user_id
+
+        resp = client.delete(f"/api/users/{user_id}", headers=headers)
+        assert resp.status_code == 204
+
+        with client.application.test_request_context("/", headers=headers):
+            with pytest.raises(Forbidden):
+                authenticate()
+
+    def test_stale_entry_for_deleted_user(self, client):
+        """get_current_user() should reject and drop a cached key whose user is gone."""
+        with client.application.test_request_context(
+            "/", headers={"swimapi-api-key": "ghost-key"}
+        ):
+            auth_cache.set(hash_api_key("ghost-key"), AuthenticatedUser(999999, "customer"))
+            with pytest.raises(Forbidden):
+                get_current_user()
+            assert auth_cache.get(hash_api_key("ghost-key")) is None
+
+    def test_current_user_memoized(self, client):
+        """get_current_user() should return the same object within a request."""
+        with client.application.test_request_context(
+            "/", headers={"swimapi-api-key": "customer-api-key1"}
+        ):
+            assert get_current_user() is get_current_user()
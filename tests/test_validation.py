@@ -0,0 +1,38 @@
+"""Unit tests for the precompiled request body validators."""
+import pytest
+from werkzeug.exceptions import BadRequest
+from swimapi.models import Reservation, User
+from swimapi.validation import SCHEMAS, get_validator, init_validators, validate_body
+
+
+class TestGetValidator:
+    """Tests for the validator registry."""
+
+    def test_validator_is_reused(self):
+        """The same validator object should be returned for repeated lookups."""
+        assert get_validator(User.json_schema) is get_validator(User.json_schema)
+
+    def test_init_builds_all(self):
+        """init_validators() should build a validator for every registered schema."""
+        init_validators()
+        for schema_fn in SCHEMAS:
+            assert get_validator(schema_fn).schema == schema_fn()
+
+
+class TestValidateBody:
+    """Tests for validate_body()."""
+
+    def test_valid(self):
+        """A valid body should not raise."""
+        validate_body({"slot_id": 1}, Reservation.post_schema)
+
+    def test_missing_field(self):
+        """A body missing a required field should raise BadRequest."""
+        with pytest.raises(BadRequest) as exc:
+            validate_body({}, Reservation.post_schema)
+        assert "'slot_id' is a required property" in str(exc.value)
+
+    def test_format_checked(self):
+        """Formats such as email should be enforced."""
+        with pytest.raises(BadRequest):
+            validate_body({"name": "Alice", "email": "not-an-email"}, User.json_schema)